@@ -1,13 +1,27 @@
 #!/usr/bin/env python3
 """
-Audio to Text Converter using OpenAI Whisper with DirectML GPU acceleration
+Audio to Text Converter using OpenAI Whisper with DirectML GPU acceleration (CPU fallback)
 Converts MP3 audio files to text transcripts with long audio support.
 """
 
 import sys
 import argparse
 import os
+import math
+import itertools
+import queue
+import shutil
+import subprocess
+import threading
+import json
+import glob
+import platform
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+import onnxruntime as ort
 from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
 from transformers import AutoProcessor
 import librosa
@@ -15,12 +29,462 @@ import time
 import torch
 import numpy as np
 
-# Add ffmpeg to PATH for Whisper
+# Shared ffprobe metadata cache lives in its own helper folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "media_probe"))
+import media_probe
+
+# Add the Windows ffmpeg install to PATH (only where it exists - elsewhere FFmpeg comes from PATH)
 ffmpeg_path = r"C:\ffmpeg\bin"
-if ffmpeg_path not in os.environ['PATH']:
+if os.path.isdir(ffmpeg_path) and ffmpeg_path not in os.environ['PATH']:
     os.environ['PATH'] = ffmpeg_path + os.pathsep + os.environ['PATH']
 
-def audio_to_text(audio_path, model_size="base", output_dir=None, language="en"):
+# Whisper works on 16 kHz mono with ~30 seconds of context per chunk
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 30
+# Decoded chunks buffered ahead of inference (bounds memory to a few chunks)
+STREAM_PREFETCH_CHUNKS = 4
+
+# Energy VAD: 30 ms frames, voiced if well above the noise floor (or -20 dB below loud speech)
+VAD_FRAME_SECONDS = 0.03
+VAD_PAD_SECONDS = 0.2       # audio kept around each voiced region so word edges survive
+VAD_MIN_RMS = 0.01          # floor for normally recorded files (~ -40 dBFS)
+VAD_PEAK_RATIO = 0.25       # quiet recordings: floor drops to this fraction of the file's loud level
+VAD_SILENCE_RMS = 0.001     # never below this (~ -60 dBFS), so near-silent files still count as silence
+VAD_NOISE_RATIO = 3.0
+VAD_SPEECH_RATIO = 0.1
+
+# Execution providers: 'auto' takes the first available, CPU is always the fallback
+DEFAULT_PROVIDER = "auto"
+PROVIDER_ALIASES = {'dml': 'DmlExecutionProvider', 'cpu': 'CPUExecutionProvider'}
+PROVIDER_PREFERENCE = ('DmlExecutionProvider', 'CPUExecutionProvider')
+PRECISIONS = ('fp32', 'int8')
+MODEL_CACHE_DIR = Path.home() / ".cache" / "huggingface" / "optimum"
+
+# Batch mode: files decoded ahead on a thread pool while the current one is transcribed.
+# Only files up to PREFETCH_MAX_SECONDS are decoded ahead; longer ones stream as usual.
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.mp4', '.avi', '.mov', '.mkv'}
+PREFETCH_FILES = 2
+PREFETCH_MAX_SECONDS = 1800
+MANIFEST_NAME = "transcripts_manifest.json"
+
+# Warm transcription server (localhost only)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+
+# (model_size, provider, precision) -> (model, processor); loaded once per process
+_model_registry = {}
+_model_registry_lock = threading.Lock()
+
+# Chunks stacked into one generate() call; halved automatically when memory runs out
+DEFAULT_BATCH_SIZE = 4
+OOM_MARKERS = ('out of memory', 'outofmemory', 'bad allocation', 'bad_alloc', 'failed to allocate')
+
+def is_out_of_memory(error):
+    """True for allocation failures raised by ONNX Runtime / DirectML / PyTorch"""
+    if isinstance(error, MemoryError):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in OOM_MARKERS)
+
+def generate_batch(model, processor, chunks, sample_rate, language):
+    """Transcribe several chunks with one generate() call over stacked input_features"""
+    inputs = processor(chunks, return_tensors="pt", sampling_rate=sample_rate)
+
+    # GPU Optimization: Move input features to GPU (DirectML device)
+    input_features = inputs["input_features"].to("dml") if torch.cuda.is_available() else inputs["input_features"]
+
+    if language == "auto":
+        generated_ids = model.generate(input_features)
+    else:
+        generated_ids = model.generate(input_features, language=language, task="transcribe")
+
+    return [text.strip() for text in processor.batch_decode(generated_ids, skip_special_tokens=True)]
+
+def transcribe_batch(model, processor, chunks, sample_rate, language, batch_size):
+    """
+    Transcribe chunks batch_size at a time, halving the batch size on out-of-memory errors.
+
+    Returns:
+        tuple: ([(text, seconds), ...] in chunk order, batch size that fit in memory)
+    """
+    results = []
+    pos = 0
+    while pos < len(chunks):
+        batch = chunks[pos:pos + batch_size]
+        batch_start = time.time()
+        try:
+            texts = generate_batch(model, processor, batch, sample_rate, language)
+        except Exception as e:
+            if batch_size > 1 and is_out_of_memory(e):
+                batch_size = max(1, batch_size // 2)
+                print(f"\n⚠️  Out of memory, retrying with batch size {batch_size}")
+                continue
+            raise
+        # One generate() call covers the whole batch, so its time is shared evenly
+        per_chunk = (time.time() - batch_start) / len(batch)
+        results.extend((text, per_chunk) for text in texts)
+        pos += len(batch)
+    return results, batch_size
+
+def stream_audio_chunks(audio_path, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS, prefetch=STREAM_PREFETCH_CHUNKS,
+                        start_seconds=0.0):
+    """
+    Decode and resample audio with FFmpeg (s16le mono) on a background thread and
+    yield (offset_seconds, float32 chunk) as soon as each chunk is decoded.
+    Decoding begins at start_seconds; offsets stay relative to the start of the file.
+
+    At most `prefetch` chunks wait in memory, so decoding overlaps inference and
+    memory stays flat regardless of file length. Falls back to librosa (whole file
+    in memory) when FFmpeg is not available.
+    """
+    chunk_samples = chunk_seconds * sample_rate
+
+    if not shutil.which('ffmpeg'):
+        audio_array, _ = librosa.load(str(audio_path), sr=sample_rate, offset=start_seconds)
+        for i in range(0, len(audio_array), chunk_samples):
+            yield start_seconds + i / sample_rate, audio_array[i:i + chunk_samples]
+        return
+
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-ss', f"{start_seconds:.3f}",
+        '-i', str(audio_path),
+        '-vn', '-ac', '1', '-ar', str(sample_rate),
+        '-f', 's16le', '-'
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    chunk_queue = queue.Queue(maxsize=prefetch)
+
+    def reader():
+        samples_read = 0
+        try:
+            while True:
+                data = process.stdout.read(chunk_samples * 2)
+                data = data[:len(data) - len(data) % 2]
+                if not data:
+                    break
+                chunk = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+                chunk_queue.put((start_seconds + samples_read / sample_rate, chunk))
+                samples_read += len(chunk)
+        finally:
+            chunk_queue.put(None)
+
+    reader_thread = threading.Thread(target=reader, daemon=True)
+    reader_thread.start()
+    try:
+        while True:
+            item = chunk_queue.get()
+            if item is None:
+                break
+            yield item
+
+        stderr = process.stderr.read().decode(errors='replace')
+        if process.wait() != 0:
+            raise RuntimeError(f"FFmpeg audio decode failed: {stderr.strip()}")
+    finally:
+        # Consumer stopped early: stop FFmpeg and unblock the reader
+        if process.poll() is None:
+            process.kill()
+        while reader_thread.is_alive():
+            try:
+                chunk_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        process.wait()
+
+def blocks_from(blocks, start_seconds, sample_rate=SAMPLE_RATE):
+    """Yield already decoded (offset_seconds, block) audio from start_seconds on"""
+    for offset, block in blocks:
+        skip = int(round((start_seconds - offset) * sample_rate))
+        if skip >= len(block):
+            continue
+        if skip > 0:
+            offset, block = start_seconds, block[skip:]
+        yield offset, block
+
+def decode_audio_blocks(audio_path):
+    """Decode a whole file into memory as (offset_seconds, block) pairs - used to prefetch batch inputs"""
+    return list(stream_audio_chunks(audio_path, prefetch=STREAM_PREFETCH_CHUNKS))
+
+def find_speech_regions(samples, sample_rate=SAMPLE_RATE, level=0.0):
+    """
+    Vectorized energy VAD over the signal.
+
+    level is the loudest speech RMS seen earlier in the same file; the absolute
+    floor follows it down so quietly recorded files are not dropped whole.
+    Returns ([(start_sample, end_sample), ...] of voiced audio, loud level of this signal).
+    """
+    frame = int(sample_rate * VAD_FRAME_SECONDS)
+    frame_count = len(samples) // frame
+    if frame_count == 0:
+        return [], 0.0
+
+    rms = np.sqrt(np.mean(samples[:frame_count * frame].reshape(frame_count, frame) ** 2, axis=1))
+    noise_floor, loud = np.percentile(rms, [10, 95])
+    floor = max(VAD_SILENCE_RMS, min(VAD_MIN_RMS, max(level, loud) * VAD_PEAK_RATIO))
+    threshold = max(floor, min(noise_floor * VAD_NOISE_RATIO, loud * VAD_SPEECH_RATIO))
+    voiced = rms > threshold
+
+    # Widen every voiced frame by the padding on both sides
+    pad = int(VAD_PAD_SECONDS / VAD_FRAME_SECONDS)
+    if pad:
+        voiced = np.convolve(voiced, np.ones(2 * pad + 1), mode='same') > 0
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    regions = [(int(start) * frame, min(len(samples), int(end) * frame)) for start, end in zip(edges[0::2], edges[1::2])]
+    return regions, float(loud)
+
+def pack_speech_chunks(regions, max_samples):
+    """
+    Group consecutive voiced regions into chunks of at most max_samples.
+    Cuts fall in the pauses between regions; only a single region longer than
+    the limit is cut mid-speech.
+    """
+    chunks = []
+    for start, end in regions:
+        if chunks and end - chunks[-1][0] <= max_samples:
+            chunks[-1][1] = end
+            continue
+        while end - start > max_samples:
+            chunks.append([start, start + max_samples])
+            start += max_samples
+        chunks.append([start, end])
+    return chunks
+
+def vad_chunks(block_stream, sample_rate=SAMPLE_RATE, max_seconds=CHUNK_SECONDS):
+    """
+    Re-cut decoded (offset_seconds, block) audio into speech-only chunks of up to
+    max_seconds, split on pauses. Silent spans are dropped; each yielded chunk
+    carries its offset in the original recording.
+
+    Only about two chunks of audio are buffered, so it works on the streaming decoder.
+    """
+    max_samples = max_seconds * sample_rate
+    pad_samples = int(VAD_PAD_SECONDS * sample_rate)
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = None  # sample offset of buffer[0] in the recording
+    level = 0.0          # loudest level so far, keeps the VAD floor relative to this file
+
+    # A trailing None flushes whatever is still buffered
+    for item in itertools.chain(block_stream, [None]):
+        if item is not None:
+            offset, block = item
+            if buffer_start is None:
+                buffer_start = int(round(offset * sample_rate))
+            buffer = np.concatenate((buffer, block))
+            if len(buffer) < 2 * max_samples:
+                continue
+        if buffer_start is None:
+            return
+
+        regions, loud = find_speech_regions(buffer, sample_rate, level)
+        level = max(level, loud)
+        chunks = pack_speech_chunks(regions, max_samples)
+        # The last chunk may still grow with the next block unless the stream ended
+        # or it is already too far back for any later speech to join it
+        last_open = item is not None and chunks and len(buffer) - chunks[-1][0] <= max_samples
+        for start, end in (chunks[:-1] if last_open else chunks):
+            yield (buffer_start + start) / sample_rate, buffer[start:end]
+
+        if item is None:
+            return
+        keep_from = chunks[-1][0] if last_open else max(chunks[-1][1] if chunks else 0, len(buffer) - pad_samples)
+        buffer = buffer[keep_from:]
+        buffer_start += keep_from
+
+def format_timestamp(seconds, separator=','):
+    """SRT style HH:MM:SS,mmm (VTT uses '.' as separator)"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+class TranscriptSinks:
+    """
+    Writes every transcribed chunk to SRT, VTT and JSONL as soon as it is decoded.
+
+    The JSONL file is the checkpoint: its first line records the source file and
+    settings, each further line one chunk {"index", "start", "end", "text"}. A rerun
+    with the same file and settings resumes after the last flushed chunk; anything
+    else starts over.
+    """
+
+    def __init__(self, output_dir, audio_path, settings):
+        stem = Path(audio_path).stem
+        self.jsonl_path = output_dir / f"{stem}_transcript.jsonl"
+        self.srt_path = output_dir / f"{stem}_transcript.srt"
+        self.vtt_path = output_dir / f"{stem}_transcript.vtt"
+
+        stat = Path(audio_path).stat()
+        self.header = {
+            'source': str(Path(audio_path).resolve()),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            **settings,
+        }
+        self.entries = self._load_checkpoint()
+
+        # SRT/VTT are rebuilt from the checkpoint, then appended to
+        self.jsonl = open(self.jsonl_path, 'w', encoding='utf-8')
+        self.srt = open(self.srt_path, 'w', encoding='utf-8')
+        self.vtt = open(self.vtt_path, 'w', encoding='utf-8')
+        self.cue_count = 0
+        self.jsonl.write(json.dumps(self.header) + "\n")
+        self.vtt.write("WEBVTT\n\n")
+        for entry in self.entries:
+            self._write_entry(entry)
+        self._flush()
+
+    def _load_checkpoint(self):
+        """Entries of a previous run of the same file and settings (a torn last line is dropped)"""
+        if not self.jsonl_path.exists():
+            return []
+        entries = []
+        with open(self.jsonl_path, 'r', encoding='utf-8') as f:
+            try:
+                if json.loads(f.readline()) != self.header:
+                    return []
+            except ValueError:
+                return []
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+        return entries
+
+    @property
+    def resume_seconds(self):
+        return self.entries[-1]['end'] if self.entries else 0.0
+
+    def _write_entry(self, entry):
+        self.jsonl.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if not entry['text']:
+            return
+        self.cue_count += 1
+        self.srt.write(f"{self.cue_count}\n{format_timestamp(entry['start'])} --> {format_timestamp(entry['end'])}\n{entry['text']}\n\n")
+        self.vtt.write(f"{format_timestamp(entry['start'], '.')} --> {format_timestamp(entry['end'], '.')}\n{entry['text']}\n\n")
+
+    def _flush(self):
+        for f in (self.jsonl, self.srt, self.vtt):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add(self, start, end, text):
+        entry = {'index': len(self.entries), 'start': round(start, 3), 'end': round(end, 3), 'text': text}
+        self.entries.append(entry)
+        self._write_entry(entry)
+        self._flush()
+
+    def close(self):
+        for f in (self.jsonl, self.srt, self.vtt):
+            f.close()
+
+def select_provider(requested=DEFAULT_PROVIDER):
+    """Resolve 'auto' / 'dml' / 'cpu' / a full provider name to an available ONNX Runtime provider"""
+    available = ort.get_available_providers()
+    requested = PROVIDER_ALIASES.get(requested, requested)
+    if requested != 'auto':
+        if requested in available:
+            return requested
+        print(f"⚠️  {requested} not available (have: {', '.join(available)}), falling back")
+    for provider in PROVIDER_PREFERENCE:
+        if provider in available:
+            return provider
+    return 'CPUExecutionProvider'
+
+def cpu_session_options(threads=None):
+    """Session options for CPU inference: one op at a time, each op spread over all cores"""
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads or os.cpu_count() or 1
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+def export_int8_model(fp32_path, int8_path):
+    """
+    Dynamically quantize every ONNX file of the fp32 export to int8 (weights int8,
+    activations quantized at runtime) and store them next to the fp32 cache.
+    """
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    else:
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+    print(f"⏳ Quantizing to int8 (first time only): {int8_path}")
+    int8_path.mkdir(parents=True, exist_ok=True)
+    for onnx_file in sorted(fp32_path.glob("*.onnx")):
+        quantizer = ORTQuantizer.from_pretrained(fp32_path, file_name=onnx_file.name)
+        quantizer.quantize(save_dir=int8_path, quantization_config=qconfig)
+        print(f"   ✓ {onnx_file.name}")
+
+    # Configs (model, generation, preprocessor) are shared with the fp32 export
+    for config_file in fp32_path.glob("*.json"):
+        if not (int8_path / config_file.name).exists():
+            shutil.copy2(config_file, int8_path / config_file.name)
+
+def load_model(model_size, provider=DEFAULT_PROVIDER, precision="fp32", threads=None):
+    """
+    Return (model, processor) for a Whisper size, ONNX Runtime provider and precision.
+    The first call loads (and on first use converts / quantizes) the model; later calls
+    in the same process reuse the loaded session.
+    """
+    provider = select_provider(provider)
+    key = (model_size, provider, precision)
+    with _model_registry_lock:
+        if key in _model_registry:
+            print(f"\n✅ Reusing loaded Whisper model: {model_size} ({provider}, {precision})")
+            return _model_registry[key]
+
+        print(f"\n{'='*70}")
+        print(f"Loading Whisper model: {model_size} ({precision}) on {provider}")
+        if provider == 'DmlExecutionProvider':
+            print(f"DirectML GPU: Available (AMD RX 6800 XT)")
+        print(f"{'='*70}\n")
+        model_id = f"openai/whisper-{model_size}"
+        session_options = cpu_session_options(threads) if provider == 'CPUExecutionProvider' else None
+        if session_options:
+            print(f"   CPU threads: {session_options.intra_op_num_threads} intra-op, 1 inter-op")
+
+        # Check if ONNX model already exists
+        cache_path = MODEL_CACHE_DIR / f"openai-whisper-{model_size}"
+
+        if cache_path.exists() and any(cache_path.glob("*.onnx")):
+            print("✅ Using cached ONNX model...")
+            model = None if precision == 'int8' else ORTModelForSpeechSeq2Seq.from_pretrained(
+                cache_path, provider=provider, session_options=session_options)
+        else:
+            print("⏳ Converting to ONNX format (first time only)...")
+            model = ORTModelForSpeechSeq2Seq.from_pretrained(model_id, provider=provider, session_options=session_options)
+            # Save the converted model for future use
+            model.save_pretrained(cache_path)
+            print(f"✅ ONNX model saved to cache: {cache_path}")
+
+        if precision == 'int8':
+            int8_path = MODEL_CACHE_DIR / f"openai-whisper-{model_size}-int8"
+            if not any(int8_path.glob("*_quantized.onnx")):
+                export_int8_model(cache_path, int8_path)
+            file_names = {f.name.replace("_quantized.onnx", ""): f.name for f in int8_path.glob("*_quantized.onnx")}
+            model = ORTModelForSpeechSeq2Seq.from_pretrained(
+                int8_path, provider=provider, session_options=session_options,
+                encoder_file_name=file_names.get("encoder_model"),
+                decoder_file_name=file_names.get("decoder_model_merged") or file_names.get("decoder_model"),
+                decoder_with_past_file_name=None if "decoder_model_merged" in file_names else file_names.get("decoder_with_past_model"),
+            )
+            print(f"✅ int8 model loaded from: {int8_path}")
+        print(f"✅ {provider} loaded successfully")
+
+        processor = AutoProcessor.from_pretrained(model_id)
+        _model_registry[key] = (model, processor)
+        return model, processor
+
+def audio_to_text(audio_path, model_size="base", output_dir=None, language="en", batch_size=DEFAULT_BATCH_SIZE,
+                  provider=DEFAULT_PROVIDER, vad=True, decoded_blocks=None, precision="fp32", threads=None):
     """
     Convert audio file to text using Whisper with DirectML GPU acceleration.
     Handles long audio files by chunking them into segments.
@@ -29,6 +493,12 @@ def audio_to_text(audio_path, model_size="base", output_dir=None, language="en")
         audio_path (str): Path to the audio file (MP3, WAV, etc.)
         model_size (str): Whisper model size (tiny, base, small, medium, large)
         output_dir (Path): Directory to save the transcript
+        batch_size (int): Chunks per generate() call (reduced automatically on OOM)
+        provider (str): 'auto', 'dml', 'cpu' or an ONNX Runtime provider name; models are cached per (model_size, provider, precision)
+        precision (str): 'fp32' or 'int8' (dynamically quantized ONNX, for CPU inference)
+        threads (int): CPU provider intra-op threads (default: all cores)
+        vad (bool): Skip silence and cut chunks on pauses instead of every 30 seconds
+        decoded_blocks (list): Audio already decoded by decode_audio_blocks (batch prefetch)
 
     Returns:
         str: Path to the generated transcript file
@@ -39,113 +509,110 @@ def audio_to_text(audio_path, model_size="base", output_dir=None, language="en")
 
     if output_dir is None:
         output_dir = Path(__file__).parent / "output_transcripts"
+    output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
 
-    # Load ONNX model with DirectML provider for GPU acceleration
-    print(f"\n{'='*70}")
-    print(f"Loading Whisper model: {model_size} with DirectML GPU acceleration")
-    print(f"DirectML GPU: Available (AMD RX 6800 XT)")
-    print(f"{'='*70}\n")
     start_time = time.time()
-    model_id = f"openai/whisper-{model_size}"
+    provider = select_provider(provider)
+    model, processor = load_model(model_size, provider, precision, threads)
 
-    # Check if ONNX model already exists
-    cache_path = Path.home() / ".cache" / "huggingface" / "optimum" / f"openai-whisper-{model_size}"
+    # Stream audio: FFmpeg decodes the next chunks while the model transcribes
+    sample_rate = SAMPLE_RATE
+    try:
+        expected_duration = media_probe.get_video_info(audio_path).get('duration', 0)
+    except (RuntimeError, OSError, ValueError):
+        expected_duration = 0
 
-    if cache_path.exists() and any(cache_path.glob("*.onnx")):
-        print("✅ Using cached ONNX model...")
-        model = ORTModelForSpeechSeq2Seq.from_pretrained(cache_path, provider="DmlExecutionProvider")
-        print("✅ DirectML provider loaded successfully")
-    else:
-        print("⏳ Converting to ONNX format (first time only)...")
-        model = ORTModelForSpeechSeq2Seq.from_pretrained(model_id, provider="DmlExecutionProvider")
-        # Save the converted model for future use
-        model.save_pretrained(cache_path)
-        print(f"✅ ONNX model saved to cache: {cache_path}")
-        print("✅ DirectML provider loaded successfully")
-
-    processor = AutoProcessor.from_pretrained(model_id)
-
-    # Load audio
-    print("\n⏳ Loading audio file...")
-    audio_load_start = time.time()
-    audio_array, sample_rate = librosa.load(str(audio_path), sr=16000)
-    audio_load_time = time.time() - audio_load_start
-
-    # Calculate duration and chunk size
-    duration_seconds = len(audio_array) / sample_rate
-    print(f"✅ Audio loaded in {audio_load_time:.2f}s")
-    print(f"   Duration: {duration_seconds:.1f}s ({duration_seconds/60:.1f} minutes)")
-    print(f"   Sample rate: {sample_rate} Hz")
-
-    # Whisper max context: ~30 seconds per chunk
-    chunk_duration = 30
-    chunk_samples = chunk_duration * sample_rate
-
-    # Split audio into chunks
-    chunks = []
-    for i in range(0, len(audio_array), int(chunk_samples)):
-        chunk = audio_array[i:i+int(chunk_samples)]
-        chunks.append(chunk)
+    print(f"\n⏳ Streaming audio at {sample_rate} Hz mono"
+          + (f" - {expected_duration:.1f}s ({expected_duration/60:.1f} minutes)" if expected_duration else ""))
+    print(f"⏳ Processing {'speech-only chunks (VAD, cut on pauses)' if vad else f'{CHUNK_SECONDS}s chunks'} "
+          f"on {provider} (batch size {batch_size})...\n")
+    # Incremental SRT/VTT/JSONL output; resumes after the last chunk a previous run flushed
+    sinks = TranscriptSinks(output_dir, audio_path, {'model': model_size, 'precision': precision, 'language': language, 'vad': vad})
+    resume_from = sinks.resume_seconds
+    if resume_from:
+        print(f"⏩ Resuming after chunk {len(sinks.entries)} at {resume_from:.1f}s (from {sinks.jsonl_path.name})\n")
 
-    print(f"⏳ Processing {len(chunks)} audio chunks with GPU DirectML...\n")
-    all_transcriptions = []
+    all_transcriptions = [entry['text'] for entry in sinks.entries]
     chunk_times = []
+    speech_samples = 0
+    decoded = {'seconds': resume_from}
 
-    # Transcribe each chunk
-    for idx, chunk in enumerate(chunks):
-        chunk_start = time.time()
-        chunk_num = idx + 1
-        chunk_duration_sec = len(chunk) / sample_rate
+    def track_decoded(blocks):
+        for offset, block in blocks:
+            decoded['seconds'] = offset + len(block) / sample_rate
+            yield offset, block
 
-        # Progress bar
-        progress = (idx / len(chunks)) * 100
-        bar_length = 40
-        filled = int(bar_length * idx / len(chunks))
-        bar = "█" * filled + "░" * (bar_length - filled)
+    if decoded_blocks is not None:
+        audio_blocks = blocks_from(decoded_blocks, resume_from, sample_rate)
+    else:
+        audio_blocks = stream_audio_chunks(audio_path, sample_rate, CHUNK_SECONDS, start_seconds=resume_from)
+    chunk_stream = track_decoded(audio_blocks)
+    if vad:
+        chunk_stream = vad_chunks(chunk_stream, sample_rate, CHUNK_SECONDS)
 
-        print(f"[{bar}] {progress:5.1f}% - Chunk {chunk_num}/{len(chunks)} ({chunk_duration_sec:.1f}s audio)", end="")
-        sys.stdout.flush()
+    # Transcribe chunks in batches as they are decoded, keeping chunk order and per-chunk timing
+    batch = []
+    # A trailing None flushes the last partial batch
+    for item in itertools.chain(chunk_stream, [None]):
+        if item is not None:
+            batch.append(item)
+            if len(batch) < batch_size:
+                continue
+        if not batch:
+            break
 
-        # Process audio chunk - move features to GPU BEFORE model.generate
-        inputs = processor(chunk, return_tensors="pt", sampling_rate=sample_rate)
+        results, batch_size = transcribe_batch(model, processor, [chunk for _, chunk in batch],
+                                               sample_rate, language, batch_size)
 
-        # GPU Optimization: Move input features to GPU (DirectML device)
-        inputs["input_features"] = inputs["input_features"].to("dml") if torch.cuda.is_available() else inputs["input_features"]
+        for (offset, chunk), (transcription, chunk_time) in zip(batch, results):
+            chunk_num = len(all_transcriptions) + 1
+            chunk_duration_sec = len(chunk) / sample_rate
 
-        # Transcribe with DirectML GPU - now has GPU-accelerated features
-        if language == "auto":
-            generated_ids = model.generate(inputs["input_features"])
-        else:
-            generated_ids = model.generate(inputs["input_features"], language=language, task="transcribe")
+            # Progress bar (by position in the recording, chunk count is unknown up front)
+            position = offset + chunk_duration_sec
+            fraction = min(1.0, position / expected_duration) if expected_duration else 0.0
+            bar_length = 40
+            filled = int(bar_length * fraction)
+            bar = "█" * filled + "░" * (bar_length - filled)
 
-        # Batch decode (handles tensor conversion internally)
-        transcription = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-        all_transcriptions.append(transcription.strip())
+            print(f"[{bar}] {fraction * 100:5.1f}% - Chunk {chunk_num} ({chunk_duration_sec:.1f}s audio @ {offset:.0f}s) ✅ {chunk_time:.2f}s")
+            sys.stdout.flush()
 
-        chunk_time = time.time() - chunk_start
-        chunk_times.append(chunk_time)
+            all_transcriptions.append(transcription)
+            chunk_times.append(chunk_time)
+            speech_samples += len(chunk)
+            sinks.add(offset, position, transcription)
+        batch = []
+    sinks.close()
 
-        # Clear line and show timing
-        print(f" ✅ {chunk_time:.2f}s")
-        sys.stdout.flush()
+    duration_seconds = decoded['seconds']
+    processed_seconds = duration_seconds - resume_from
+    speech_seconds = speech_samples / sample_rate
+    if duration_seconds <= 0:
+        raise RuntimeError(f"No audio decoded from {audio_path}")
+    if vad and processed_seconds > 0 and speech_samples == 0:
+        print(f"⚠️  VAD found no speech in {processed_seconds:.1f}s of audio, transcript is empty - rerun with --no-vad to transcribe it anyway")
 
     # Concatenate all transcriptions
-    full_transcription = " ".join(all_transcriptions)
+    full_transcription = " ".join(text for text in all_transcriptions if text)
 
     # Calculate statistics
     total_transcription_time = time.time() - start_time
     avg_chunk_time = sum(chunk_times) / len(chunk_times) if chunk_times else 0
-    real_time_factor = total_transcription_time / duration_seconds
+    real_time_factor = total_transcription_time / processed_seconds if processed_seconds > 0 else 0
 
     print(f"\n{'='*70}")
     print(f"✅ TRANSCRIPTION COMPLETE")
     print(f"{'='*70}")
     print(f"Total time: {total_transcription_time:.2f}s")
     print(f"Audio duration: {duration_seconds:.1f}s ({duration_seconds/60:.1f} minutes)")
+    if vad:
+        print(f"Speech transcribed: {speech_seconds:.1f}s ({speech_seconds / max(processed_seconds, 1e-9) * 100:.0f}%, silence skipped)")
     print(f"Average per chunk: {avg_chunk_time:.2f}s")
     print(f"Real-time factor: {real_time_factor:.2f}x (lower is faster)")
     print(f"Total characters: {len(full_transcription)}")
+    print(f"Subtitles: {sinks.srt_path.name}, {sinks.vtt_path.name}, {sinks.jsonl_path.name}")
     print(f"{'='*70}\n")
 
     # Save transcript
@@ -154,9 +621,9 @@ def audio_to_text(audio_path, model_size="base", output_dir=None, language="en")
         f.write(f"# Audio Transcript: {audio_path.name}\n\n")
         f.write(f"**File:** {audio_path.name}\n")
         f.write(f"**Duration:** {duration_seconds:.1f}s ({duration_seconds/60:.1f} minutes)\n")
-        f.write(f"**Model:** {model_size} (DirectML GPU accelerated)\n")
+        f.write(f"**Model:** {model_size} ({precision}, {provider})\n")
         f.write(f"**Language:** {language}\n")
-        f.write(f"**Chunks processed:** {len(chunks)}\n")
+        f.write(f"**Chunks processed:** {len(all_transcriptions)}\n")
         f.write(f"**Transcription time:** {total_transcription_time:.2f}s\n")
         f.write(f"**Real-time factor:** {real_time_factor:.2f}x\n")
         f.write(f"**Generated:** {Path(__file__).parent.stem} tool\n\n")
@@ -167,9 +634,341 @@ def audio_to_text(audio_path, model_size="base", output_dir=None, language="en")
     print(f"✅ Transcript saved to: {transcript_path}")
     return str(transcript_path)
 
+def collect_audio_files(pattern):
+    """Audio/video files in a directory, or matching a glob pattern"""
+    path = Path(pattern)
+    if path.is_dir():
+        candidates = sorted(path.iterdir())
+    else:
+        # "Song [Live].mp3" is a literal name as far as the user is concerned
+        matches = glob.glob(pattern) or glob.glob(glob.escape(pattern))
+        candidates = sorted(Path(p) for p in matches)
+    return [p for p in candidates if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS]
+
+def is_glob_or_dir(pattern):
+    """Directory or wildcard pattern; an existing file is always a single input, brackets and all"""
+    path = Path(pattern)
+    if path.is_file():
+        return False
+    return path.is_dir() or glob.has_magic(pattern)
+
+def transcribe_files(files, model_size="base", output_dir=None, language="en", batch_size=DEFAULT_BATCH_SIZE,
+                     vad=True, prefetch=PREFETCH_FILES, provider=DEFAULT_PROVIDER, precision="fp32", threads=None):
+    """
+    Transcribe many files with one loaded model. The next files are decoded on a
+    thread pool while the current one is in inference.
+
+    transcripts_manifest.json in the output folder records every input; inputs whose
+    transcript exists and is newer than the audio are skipped.
+
+    Returns:
+        list: per-file dicts (file, status, audio_seconds, seconds, transcript)
+    """
+    output_dir = Path(output_dir) if output_dir else Path(__file__).parent / "output_transcripts"
+    output_dir.mkdir(exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    rows = []
+    pending = []
+    for audio_path in files:
+        transcript = output_dir / f"{audio_path.stem}_transcript.md"
+        entry = manifest.get(str(audio_path.resolve()))
+        if entry and transcript.exists() and transcript.stat().st_mtime > audio_path.stat().st_mtime:
+            print(f"⏭️  Up to date: {audio_path.name}")
+            rows.append({'file': audio_path.name, 'status': 'skipped', 'audio_seconds': entry.get('audio_seconds', 0),
+                         'seconds': 0, 'transcript': str(transcript)})
+        else:
+            pending.append(audio_path)
+
+    durations = {}
+    for audio_path in pending:
+        try:
+            durations[audio_path] = media_probe.get_video_info(audio_path).get('duration', 0)
+        except (RuntimeError, OSError, ValueError):
+            durations[audio_path] = 0
+
+    print(f"\n📂 {len(pending)} files to transcribe, {len(files) - len(pending)} up to date")
+    batch_start = time.time()
+    provider = select_provider(provider)
+    if pending:
+        load_model(model_size, provider, precision, threads)
+
+    with ThreadPoolExecutor(max_workers=max(1, prefetch)) as pool:
+        futures = {}
+
+        def schedule(index):
+            if index < len(pending) and 0 < durations[pending[index]] <= PREFETCH_MAX_SECONDS:
+                futures[index] = pool.submit(decode_audio_blocks, pending[index])
+
+        for index in range(prefetch):
+            schedule(index)
+
+        for index, audio_path in enumerate(pending):
+            print(f"\n📁 File {index + 1}/{len(pending)}: {audio_path.name}")
+            decoded_blocks = None
+            if index in futures:
+                try:
+                    decoded_blocks = futures.pop(index).result()
+                except RuntimeError as e:
+                    print(f"⚠️  Prefetch failed ({e}), streaming instead")
+            if prefetch:
+                schedule(index + prefetch)
+
+            file_start = time.time()
+            try:
+                transcript = audio_to_text(audio_path, model_size, output_dir, language, batch_size,
+                                           provider=provider, vad=vad, decoded_blocks=decoded_blocks,
+                                           precision=precision, threads=threads)
+                status = 'done'
+            except Exception as e:
+                print(f"❌ {audio_path.name}: {e}")
+                transcript, status = None, 'error'
+            decoded_blocks = None
+            elapsed = time.time() - file_start
+
+            audio_seconds = durations[audio_path]
+            rows.append({'file': audio_path.name, 'status': status, 'audio_seconds': audio_seconds,
+                         'seconds': elapsed, 'transcript': transcript})
+            if status == 'done':
+                manifest[str(audio_path.resolve())] = {
+                    'transcript': transcript,
+                    'audio_seconds': audio_seconds,
+                    'seconds': round(elapsed, 2),
+                    'model': model_size,
+                    'language': language,
+                }
+                temp_path = manifest_path.with_suffix('.tmp')
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f, indent=2)
+                os.replace(temp_path, manifest_path)
+
+    print_batch_summary(rows, time.time() - batch_start)
+    return rows
+
+def print_batch_summary(rows, wall_seconds):
+    done = [row for row in rows if row['status'] == 'done']
+    audio_seconds = sum(row['audio_seconds'] for row in done)
+    busy_seconds = sum(row['seconds'] for row in done)
+
+    print(f"\n{'='*70}")
+    print("✅ BATCH COMPLETE")
+    print(f"{'='*70}")
+    print(f"{'File':<36}{'Status':>9}{'Audio':>10}{'Time':>9}{'RTF':>7}")
+    for row in rows:
+        rtf = f"{row['seconds'] / row['audio_seconds']:.2f}" if row['status'] == 'done' and row['audio_seconds'] else '-'
+        name = row['file'] if len(row['file']) <= 34 else row['file'][:31] + '...'
+        print(f"{name:<36}{row['status']:>9}{row['audio_seconds']:>9.0f}s{row['seconds']:>8.1f}s{rtf:>7}")
+    print(f"{'-'*70}")
+    print(f"Transcribed: {len(done)}, skipped: {sum(row['status'] == 'skipped' for row in rows)}, "
+          f"failed: {sum(row['status'] == 'error' for row in rows)}")
+    if audio_seconds:
+        print(f"Aggregate real-time factor: {busy_seconds / audio_seconds:.2f}x ({audio_seconds/60:.1f} minutes of audio)")
+    if wall_seconds > 0 and done:
+        print(f"Throughput: {len(done) / (wall_seconds / 3600):.1f} files/hour")
+    print(f"{'='*70}\n")
+
+def benchmark_precisions(audio_path, model_size="base", output_dir=None, language="en", batch_size=DEFAULT_BATCH_SIZE,
+                         provider=DEFAULT_PROVIDER, vad=True, threads=None):
+    """Transcribe the same file with fp32 and int8 models and compare real-time factors"""
+    provider = select_provider(provider)
+    output_dir = Path(output_dir) if output_dir else Path(__file__).parent / "output_transcripts"
+    try:
+        duration = media_probe.get_video_info(audio_path).get('duration', 0)
+    except (RuntimeError, OSError, ValueError):
+        duration = 0
+
+    results = {}
+    for precision in PRECISIONS:
+        run_dir = output_dir / f"benchmark_{precision}"
+        shutil.rmtree(run_dir, ignore_errors=True)  # never resume - always a full run
+        run_dir.mkdir(parents=True)
+        load_model(model_size, provider, precision, threads)  # loading is not part of the timing
+        run_start = time.time()
+        audio_to_text(audio_path, model_size, run_dir, language, batch_size, provider=provider, vad=vad,
+                      precision=precision, threads=threads)
+        results[precision] = time.time() - run_start
+
+    print(f"\n{'='*70}")
+    print(f"📊 PRECISION BENCHMARK - {Path(audio_path).name} ({model_size}, {provider})")
+    print(f"{'='*70}")
+    print(f"{'Precision':<12}{'Time':>10}{'RTF':>10}{'Speedup':>10}")
+    for precision, seconds in results.items():
+        rtf = f"{seconds / duration:.3f}" if duration else '-'
+        print(f"{precision:<12}{seconds:>9.1f}s{rtf:>10}{results['fp32'] / seconds:>9.2f}x")
+    print(f"Transcripts: {output_dir / 'benchmark_fp32'} and {output_dir / 'benchmark_int8'} (compare for accuracy)")
+    print(f"{'='*70}\n")
+    return results
+
+class TranscriptionServer:
+    """
+    Keeps Whisper sessions warm and runs queued transcription jobs one at a time
+    (one GPU, so jobs never compete for it).
+
+    POST /jobs        {"audio_path", "model", "language", "output_dir", "batch_size", "vad", "provider", "precision"}
+    GET  /jobs/<id>   {"id", "status": queued|running|done|error, "transcript_path", "error"}
+    GET  /jobs        all jobs
+
+    Only local clients are served: POST bodies must be application/json, and any
+    request carrying an Origin header (i.e. sent by a web page) is refused, so sites
+    open in a browser cannot queue jobs with a cross-origin form post.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.job_queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.next_id = 1
+
+    def submit(self, request):
+        if not isinstance(request, dict) or not request.get('audio_path'):
+            raise ValueError("audio_path is required")
+        if not Path(str(request['audio_path'])).is_file():
+            raise ValueError(f"Audio file not found: {request['audio_path']}")
+        with self.lock:
+            job = {
+                'id': self.next_id,
+                'status': 'queued',
+                'audio_path': request['audio_path'],
+                'model': request.get('model', 'base'),
+                'language': request.get('language', 'en'),
+                'output_dir': request.get('output_dir'),
+                'batch_size': max(1, int(request.get('batch_size', DEFAULT_BATCH_SIZE))),
+                'vad': bool(request.get('vad', True)),
+                'provider': request.get('provider', DEFAULT_PROVIDER),
+                'precision': request.get('precision', 'fp32') if request.get('precision') in PRECISIONS else 'fp32',
+                'transcript_path': None,
+                'error': None,
+            }
+            self.jobs[job['id']] = job
+            self.next_id += 1
+        self.job_queue.put(job['id'])
+        print(f"📥 Job {job['id']} queued: {job['audio_path']} ({self.job_queue.qsize()} waiting)")
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def worker(self):
+        while True:
+            job_id = self.job_queue.get()
+            with self.lock:
+                job = self.jobs[job_id]
+                job['status'] = 'running'
+            try:
+                transcript_path = audio_to_text(job['audio_path'], job['model'], job['output_dir'],
+                                                job['language'], job['batch_size'], provider=job['provider'],
+                                                vad=job['vad'], precision=job['precision'])
+                with self.lock:
+                    job['status'], job['transcript_path'] = 'done', transcript_path
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                with self.lock:
+                    job['status'], job['error'] = 'error', str(e)
+
+    def serve(self, host=SERVER_HOST, port=SERVER_PORT):
+        server_state = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _from_browser(self):
+                if self.headers.get('Origin') is None:
+                    return False
+                self._reply(403, {'error': 'requests from web pages are not accepted'})
+                return True
+
+            def do_POST(self):
+                if self._from_browser():
+                    return
+                if self.path.rstrip('/') != '/jobs':
+                    return self._reply(404, {'error': 'not found'})
+                if self.headers.get_content_type() != 'application/json':
+                    return self._reply(415, {'error': 'Content-Type must be application/json'})
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    job = server_state.submit(json.loads(self.rfile.read(length) or b'{}'))
+                except (ValueError, TypeError) as e:
+                    return self._reply(400, {'error': str(e)})
+                self._reply(202, job)
+
+            def do_GET(self):
+                if self._from_browser():
+                    return
+                parts = self.path.strip('/').split('/')
+                if parts == ['jobs']:
+                    with server_state.lock:
+                        return self._reply(200, list(server_state.jobs.values()))
+                if len(parts) == 2 and parts[0] == 'jobs' and parts[1].isdigit():
+                    job = server_state.get(int(parts[1]))
+                    return self._reply(200, job) if job else self._reply(404, {'error': 'unknown job'})
+                self._reply(404, {'error': 'not found'})
+
+            def log_message(self, format, *args):
+                pass  # job progress is printed by the worker instead
+
+        threading.Thread(target=self.worker, daemon=True).start()
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        print(f"🎧 Transcription server listening on http://{host}:{port} (Ctrl+C to stop)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n⏹️  Server stopped")
+        finally:
+            httpd.server_close()
+
+def submit_to_server(server_url, audio_path, model_size="base", output_dir=None, language="en",
+                     batch_size=DEFAULT_BATCH_SIZE, vad=True, provider=DEFAULT_PROVIDER, precision="fp32",
+                     poll_interval=1.0):
+    """
+    Queue a job on a running transcription server and wait for it to finish.
+    Raises ConnectionError when no server is listening.
+    """
+    request = {
+        'audio_path': str(Path(audio_path).resolve()),
+        'model': model_size,
+        'language': language,
+        'output_dir': str(Path(output_dir).resolve()) if output_dir else None,
+        'batch_size': batch_size,
+        'vad': vad,
+        'provider': provider,
+        'precision': precision,
+    }
+    server_url = server_url.rstrip('/')
+    try:
+        post = urllib.request.Request(f"{server_url}/jobs", data=json.dumps(request).encode('utf-8'),
+                                      headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(post, timeout=10) as response:
+            job = json.load(response)
+    except (urllib.error.URLError, ConnectionError) as e:
+        raise ConnectionError(f"No transcription server at {server_url}: {e}")
+
+    print(f"📤 Submitted as job {job['id']} to {server_url}")
+    while job['status'] in ('queued', 'running'):
+        time.sleep(poll_interval)
+        with urllib.request.urlopen(f"{server_url}/jobs/{job['id']}", timeout=10) as response:
+            job = json.load(response)
+
+    if job['status'] != 'done':
+        raise RuntimeError(job.get('error') or f"Job {job['id']} failed")
+    return job['transcript_path']
+
 def main():
     parser = argparse.ArgumentParser(description="Convert audio files to text using Whisper")
-    parser.add_argument("audio_file", help="Path to the audio file (MP3, WAV, etc.)")
+    parser.add_argument("audio_file", nargs="?",
+                       help="Path to the audio file (MP3, WAV, etc.), or a folder / glob pattern for batch mode")
     parser.add_argument("--model", default="base",
                        choices=["tiny", "base", "small", "medium", "large"],
                        help="Whisper model size (default: base)")
@@ -177,11 +976,64 @@ def main():
     parser.add_argument("--language", default="en",
                        choices=["en", "zh", "ja", "es", "fr", "de", "ko", "auto"],
                        help="Language for transcription (default: en, use 'auto' for detection)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                       help=f"30s chunks per generate() call, halved automatically on out-of-memory (default: {DEFAULT_BATCH_SIZE})")
+
+    parser.add_argument("--no-vad", action="store_true",
+                       help="Cut fixed 30s chunks including silence instead of speech-only chunks cut on pauses")
+    parser.add_argument("--provider", default=DEFAULT_PROVIDER,
+                       help="Execution provider: auto (DirectML if available, else CPU), dml, cpu (default: auto)")
+    parser.add_argument("--precision", choices=PRECISIONS, default="fp32",
+                       help="fp32, or int8 dynamically quantized ONNX (fastest on CPU, cached after first export)")
+    parser.add_argument("--threads", type=int,
+                       help="CPU provider intra-op threads (default: all cores)")
+    parser.add_argument("--benchmark", action="store_true",
+                       help="Transcribe the file with fp32 and int8 and compare real-time factors")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_FILES,
+                       help=f"Batch mode: files decoded ahead while one is transcribed (default: {PREFETCH_FILES})")
+    parser.add_argument("--serve", action="store_true",
+                       help=f"Run a warm transcription server on {SERVER_HOST} that queues jobs and keeps models loaded")
+    parser.add_argument("--port", type=int, default=SERVER_PORT,
+                       help=f"Port for --serve / --server (default: {SERVER_PORT})")
+    parser.add_argument("--server", action="store_true",
+                       help="Send the file to a running --serve instance (runs locally if none is listening)")
 
     args = parser.parse_args()
 
+    if args.serve:
+        TranscriptionServer().serve(SERVER_HOST, args.port)
+        return
+    if not args.audio_file:
+        parser.error("audio_file is required unless --serve is used")
+
+    if is_glob_or_dir(args.audio_file):
+        files = collect_audio_files(args.audio_file)
+        if not files:
+            print(f"Error: No audio files found for {args.audio_file}", file=sys.stderr)
+            sys.exit(1)
+        rows = transcribe_files(files, args.model, args.output_dir, args.language, max(1, args.batch_size),
+                                vad=not args.no_vad, prefetch=max(0, args.prefetch), provider=args.provider,
+                                precision=args.precision, threads=args.threads)
+        sys.exit(1 if any(row['status'] == 'error' for row in rows) else 0)
+
+    if args.benchmark:
+        benchmark_precisions(args.audio_file, args.model, args.output_dir, args.language, max(1, args.batch_size),
+                             provider=args.provider, vad=not args.no_vad, threads=args.threads)
+        return
+
     try:
-        transcript_path = audio_to_text(args.audio_file, args.model, args.output_dir, args.language)
+        transcript_path = None
+        if args.server:
+            try:
+                transcript_path = submit_to_server(f"http://{SERVER_HOST}:{args.port}", args.audio_file, args.model,
+                                                   args.output_dir, args.language, max(1, args.batch_size),
+                                                   vad=not args.no_vad, provider=args.provider, precision=args.precision)
+            except ConnectionError as e:
+                print(f"⚠️  {e} - transcribing in this process")
+        if transcript_path is None:
+            transcript_path = audio_to_text(args.audio_file, args.model, args.output_dir, args.language, max(1, args.batch_size),
+                                            provider=args.provider, vad=not args.no_vad, precision=args.precision,
+                                            threads=args.threads)
         print(f"Success! Transcript: {transcript_path}")
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -1,113 +1,499 @@
 # Unity Image Extractor
-# Extracts images from Unity3D bundle files and converts them to PNG
+# Extracts images from Unity3D bundle files and saves them as PNG, lossless WebP or raw RGBA
 # Works with any Unity game files containing Texture2D or Sprite assets
 
+import io
 import os
 import sys
+import json
+import mmap
+import time
+import shutil
+import hashlib
 import UnityPy
 from PIL import Image
 import glob
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 
+UNITY_SIGNATURE = b'UnityFS'
+TEXTURE_TYPES = ('Texture2D', 'Sprite')
+
+# Parallel mode: bundles larger than this are split into texture partitions so one
+# huge bundle does not keep a single worker busy while the others sit idle
+LARGE_BUNDLE_BYTES = 256 * 1024 * 1024
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Output encoders: PNG with a selectable zlib level (PIL's default is 6, 1 is several
+# times faster for bulk dumps), lossless WebP, or raw RGBA bytes with no encoding at all
+IMAGE_ENCODERS = {'png': '.png', 'webp': '.webp', 'raw': '.rgba'}
+DEFAULT_PNG_LEVEL = 6
+WEBP_METHOD = 0  # fastest lossless effort
+DEDUP_MODES = ('hardlink', 'index', 'off')
+
+# Incremental mode: what was extracted from which bundle, kept in the output directory
+MANIFEST_NAME = "extraction_manifest.json"
+HASH_BLOCK_SIZE = 1 << 20
+
+def file_hash(path):
+    """BLAKE2b of a whole file, read in blocks"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault('bundles', {})
+    return manifest
+
+def save_manifest(output_dir, manifest):
+    """Write the manifest atomically, so an interrupted run never leaves half a file"""
+    manifest_path = Path(output_dir) / MANIFEST_NAME
+    temp_path = manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, manifest_path)
+
+def bundle_key(file_path, output_subdir=None):
+    """Manifest key: the bundle's output folder relative to the output directory"""
+    return (Path(output_subdir or '') / Path(file_path).stem).as_posix()
+
+def bundle_unchanged(entry, file_path):
+    """
+    True if the manifest entry still matches the file. Size and mtime decide without
+    reading the file; only a touched file of the same size is hashed.
+    """
+    if not entry or not entry.get('hash'):
+        return False
+    stat = os.stat(file_path)
+    if entry.get('size') != stat.st_size:
+        return False
+    if entry.get('mtime') == stat.st_mtime_ns:
+        return True
+    if file_hash(file_path) == entry['hash']:
+        entry['mtime'] = stat.st_mtime_ns
+        return True
+    return False
+
+def safe_texture_name(obj, name):
+    """File-system safe name; short or empty names fall back to type and path_id"""
+    safe_name = "".join(c for c in (name or "") if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    if not safe_name or len(safe_name) < 3:
+        # path_id, not a running count, so names do not depend on partitioning
+        safe_name = f"{obj.type.name}_{obj.path_id}"
+    return safe_name
+
+def texture_objects(env):
+    """Texture2D/Sprite object readers of a bundle, in bundle order"""
+    return [obj for obj in env.objects if obj.type.name in TEXTURE_TYPES]
+
+def unique_texture_names(env, textures):
+    """
+    {path_id: name} for the textures of one bundle. The first texture with a name keeps
+    it, later ones get a _{path_id} suffix instead of overwriting the earlier file.
+
+    Names come from reader metadata only - peek_name() (newer UnityPy) or the bundle's
+    container paths - never obj.read(), so textures the manifest skips are not deserialized.
+    """
+    container_names = {}
+    try:
+        for asset_path, pointer in env.container.items():
+            path_id = getattr(pointer, 'path_id', getattr(pointer, 'm_PathID', None))
+            container_names.setdefault(path_id, Path(asset_path).stem)
+    except Exception:
+        pass  # no AssetBundle container: names fall back to type and path_id
+
+    names = {}
+    used = set()
+    for obj in textures:
+        peek_name = getattr(obj, 'peek_name', None)
+        try:
+            name = peek_name() if peek_name else container_names.get(obj.path_id)
+        except Exception:
+            name = container_names.get(obj.path_id)
+        safe_name = safe_texture_name(obj, name)
+        if safe_name.lower() in used:  # Windows file names are case-insensitive
+            safe_name = f"{safe_name}_{obj.path_id}"
+        used.add(safe_name.lower())
+        names[obj.path_id] = safe_name
+    return names
+
+def link_or_copy(source, destination):
+    if destination.exists():
+        destination.unlink()
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+def encode_image(img, output_file, image_format, png_level=DEFAULT_PNG_LEVEL):
+    """Write a decoded PIL image as PNG (chosen zlib level), lossless WebP or raw RGBA bytes"""
+    if image_format == 'png':
+        img.save(str(output_file), 'PNG', compress_level=png_level)
+    elif image_format == 'webp':
+        img.save(str(output_file), 'WEBP', lossless=True, method=WEBP_METHOD)
+    else:
+        with open(output_file, 'wb') as f:
+            f.write(img.convert('RGBA').tobytes())
+
+def bundle_record(file_path, assets, image_format, dedup):
+    """Manifest entry of a fully extracted bundle, with the output settings it was extracted with"""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': file_hash(file_path),
+            'format': image_format, 'dedup': dedup, 'assets': assets}
+
+class OffsetFile(io.RawIOBase):
+    """Read-only file object that starts at `offset`, so UnityPy sees the bundle at position 0"""
+    def __init__(self, path, offset):
+        self._file = open(path, 'rb')
+        self._offset = offset
+        self._file.seek(offset)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._file.readinto(buffer)
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position += self._offset
+        return self._file.seek(position, whence) - self._offset
+
+    def tell(self):
+        return self._file.tell() - self._offset
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+@contextmanager
+def open_unity_bundle(file_path):
+    """
+    Yield a UnityPy environment for the bundle starting at the UnityFS signature,
+    or None if the file has none.
+
+    The file is memory-mapped and UnityPy gets a zero-copy memoryview from the
+    signature on, so nothing is copied or written back to disk. If UnityPy rejects
+    the view or finds no objects in it, an offset file object over the same file
+    is used instead.
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            yield None
+            return
+
+    view = None
+    source = None
+    try:
+        offset = mm.find(UNITY_SIGNATURE)
+        if offset == -1:
+            yield None
+            return
+        view = memoryview(mm)[offset:]
+        try:
+            env = UnityPy.load(view)
+        except Exception:
+            env = None
+        # Some UnityPy versions do not recognise a memoryview and return an empty
+        # environment instead of raising - read through the offset file then
+        if env is None or not env.objects:
+            env = None
+            try:
+                view.release()
+                view = None
+            except BufferError:
+                pass  # a half-built reader still holds slices; released in finally
+            source = OffsetFile(file_path, offset)
+            env = UnityPy.load(source)
+        yield env
+    finally:
+        env = None
+        if source is not None:
+            source.close()
+        try:
+            if view is not None:
+                view.release()
+            mm.close()
+        except BufferError:
+            pass  # UnityPy still holds slices of the map; it is unmapped when they are freed
+
 class UnityImageExtractor:
-    def __init__(self, output_dir=None):
+    def __init__(self, output_dir=None, force=False, manifest=None, image_format='png',
+                 png_level=DEFAULT_PNG_LEVEL, dedup='hardlink'):
         # Follow guidelines: ALWAYS create outputs in the specific helper's subfolder
         script_dir = Path(__file__).parent
         if output_dir is None or output_dir == "extracted_images":
             self.output_dir = str(script_dir / "extracted_images")
         else:
             self.output_dir = output_dir
-        self.stats = {"files_processed": 0, "images_extracted": 0, "errors": 0}
-
-    def extract_from_unity_file(self, file_path, output_subdir=None):
-        """Extract images from a single Unity3D file"""
+        self.stats = {"files_processed": 0, "images_extracted": 0, "errors": 0,
+                      "files_skipped": 0, "images_skipped": 0, "images_deduplicated": 0}
+        # force ignores what earlier runs extracted (the manifest is still rewritten)
+        self.force = force
+        self.manifest = manifest if manifest is not None else load_manifest(self.output_dir)
+        self.image_format = image_format
+        self.png_level = png_level
+        self.dedup = dedup
+        self._written_images = {}  # pixel hash -> first file written with those pixels
+
+    def options(self):
+        """Settings a worker process needs to extract the same way as this extractor"""
+        return {'force': self.force, 'image_format': self.image_format,
+                'png_level': self.png_level, 'dedup': self.dedup}
+
+    def extract_from_unity_file(self, file_path, output_subdir=None, part=0, parts=1, names=None):
+        """
+        Extract images from a single Unity3D file.
+        With parts > 1 only every parts-th texture (starting at `part`) is extracted,
+        so several processes can share one large bundle; `names` is the bundle's
+        unique_texture_names table, built once for all of them.
+        """
+        label = os.path.basename(file_path) + (f" [part {part + 1}/{parts}]" if parts > 1 else "")
+        key = bundle_key(file_path, output_subdir)
+        previous = {} if self.force else self.manifest['bundles'].get(key, {})
         try:
-            # Read the file
-            with open(file_path, 'rb') as f:
-                data = f.read()
-
-            # Find Unity signature
-            unity_sig = b'UnityFS'
-            offset = data.find(unity_sig)
-
-            if offset == -1:
-                print(f"✗ {os.path.basename(file_path)} - No Unity signature found")
-                self.stats["errors"] += 1
+            output_path = self._output_path(file_path, output_subdir)
+            if self._bundle_current(previous, file_path, output_path):
+                if part == 0:
+                    print(f"= {os.path.basename(file_path)} - Unchanged, skipped")
+                    self.stats["files_skipped"] += 1
                 return 0
 
-            # Extract Unity data
-            unity_data = data[offset:]
-
-            # Create output directory
-            base_name = Path(file_path).stem
-            if output_subdir:
-                output_path = Path(self.output_dir) / output_subdir / base_name
-            else:
-                output_path = Path(self.output_dir) / base_name
-
-            output_path.mkdir(parents=True, exist_ok=True)
-
-            # Save temp bundle and load with UnityPy
-            temp_path = output_path / "temp_unity.bundle"
-            with open(temp_path, 'wb') as f:
-                f.write(unity_data)
-
-            env = UnityPy.load(str(temp_path))
-
-            extracted_count = 0
-
-            # Process all objects
-            for obj in env.objects:
-                if obj.type.name in ['Texture2D', 'Sprite']:
-                    try:
-                        obj_data = obj.read()
-
-                        img = None
-                        if hasattr(obj_data, 'image') and obj_data.image:
-                            img = obj_data.image
-
-                        if img:
-                            # Create safe filename
-                            obj_name = getattr(obj_data, 'name', None) or f"{obj.type.name}_{obj.path_id}"
-                            safe_name = "".join(c for c in obj_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                            if not safe_name or len(safe_name) < 3:
-                                safe_name = f"{obj.type.name}_{extracted_count}"
+            with open_unity_bundle(file_path) as env:
+                if env is None:
+                    # Every partition sees the same file - report it once
+                    if part == 0:
+                        print(f"✗ {os.path.basename(file_path)} - No Unity signature found")
+                        self.stats["errors"] += 1
+                    return 0
 
-                            filename = f"{safe_name}.png"
-                            output_file = output_path / filename
+                # Create output directory
+                output_path.mkdir(parents=True, exist_ok=True)
 
-                            # Save the image
-                            img.save(str(output_file))
-                            extracted_count += 1
+                extracted_count, skipped_count, assets = self._save_images(
+                    env, output_path, part, parts, previous.get('assets', {}), names)
 
-                    except Exception as e:
-                        continue
-
-            # Clean up temp file
-            try:
-                temp_path.unlink()
-            except:
-                pass
+            if parts == 1:
+                self.manifest['bundles'][key] = bundle_record(file_path, assets, self.image_format, self.dedup)
+            else:
+                # A partition only knows its own textures; extract_parallel completes the entry
+                self.manifest['bundles'][key] = {'assets': assets}
 
-            self.stats["files_processed"] += 1
+            if part == 0:
+                self.stats["files_processed"] += 1
             self.stats["images_extracted"] += extracted_count
+            self.stats["images_skipped"] += skipped_count
 
+            unchanged = f", {skipped_count} unchanged" if skipped_count else ""
             if extracted_count > 0:
-                print(f"✓ {os.path.basename(file_path)} - {extracted_count} images extracted")
+                print(f"✓ {label} - {extracted_count} images extracted{unchanged}")
+            elif skipped_count:
+                print(f"= {label} - {skipped_count} images unchanged")
             else:
-                print(f"- {os.path.basename(file_path)} - No images found")
+                print(f"- {label} - No images found")
 
             return extracted_count
 
         except Exception as e:
-            print(f"✗ {os.path.basename(file_path)} - Error: {e}")
+            print(f"✗ {label} - Error: {e}")
             self.stats["errors"] += 1
             return 0
 
-    def extract_from_directory(self, source_dir, recursive=True):
-        """Extract images from all Unity3D files in a directory"""
+    def _output_path(self, file_path, output_subdir=None):
+        base_name = Path(file_path).stem
+        if output_subdir:
+            return Path(self.output_dir) / output_subdir / base_name
+        return Path(self.output_dir) / base_name
+
+    def _bundle_current(self, previous, file_path, output_path):
+        """
+        Unchanged since the last run, extracted with the same format and dedup mode,
+        and its output folder is still there: skip without opening the bundle
+        """
+        # Entries written before these settings were recorded used the defaults
+        same_settings = (previous.get('format', 'png') == self.image_format
+                         and previous.get('dedup', 'hardlink') == self.dedup)
+        return same_settings and output_path.is_dir() and bundle_unchanged(previous, file_path)
+
+    def _partition_names(self, file_path):
+        """Texture name table of a bundle split across workers, so partitions need not each build it"""
+        try:
+            with open_unity_bundle(file_path) as env:
+                return unique_texture_names(env, texture_objects(env)) if env is not None else None
+        except Exception:
+            return None  # the partitions build it themselves and report the error
+
+    def _save_images(self, env, output_path, part=0, parts=1, previous_assets=None, names=None):
+        """
+        Save every Texture2D/Sprite of this partition of a loaded bundle with the selected encoder.
+        Textures whose raw object data hashes the same as in previous_assets (and whose
+        file still exists) are not decoded again; decoded images already written by this
+        extractor are hardlinked or indexed instead of encoded again.
+        Returns (extracted, skipped, {path_id: {'hash', 'file', ...}}).
+        """
+        extracted_count = 0
+        skipped_count = 0
+        assets = {}
+        previous_assets = previous_assets or {}
+
+        # Textures are dealt round-robin to partitions in bundle order, so the split is deterministic.
+        # Names are assigned over the whole bundle, so every partition agrees on collisions.
+        textures = texture_objects(env)
+        if names is None:
+            names = unique_texture_names(env, textures)
+        extension = IMAGE_ENCODERS[self.image_format]
+        for obj in textures[part::parts]:
+            try:
+                # Hashing the serialized object is far cheaper than decoding the texture
+                raw_hash = hashlib.blake2b(obj.get_raw_data(), digest_size=16).hexdigest()
+                previous = previous_assets.get(str(obj.path_id))
+                if previous and previous['hash'] == raw_hash and previous.get('format', 'png') == self.image_format \
+                        and ('duplicate_of' not in previous or self.dedup == 'index') \
+                        and self._asset_exists(output_path, previous):
+                    assets[str(obj.path_id)] = previous
+                    skipped_count += 1
+                    continue
+
+                obj_data = obj.read()
+
+                img = None
+                if hasattr(obj_data, 'image') and obj_data.image:
+                    img = obj_data.image
+
+                if img:
+                    filename = f"{names[obj.path_id]}{extension}"
+                    if self.image_format == 'raw':
+                        filename = f"{names[obj.path_id]}.{img.width}x{img.height}{extension}"
+                    output_file = output_path / filename
+                    record = {'hash': raw_hash, 'file': filename, 'format': self.image_format}
+
+                    # Sprites cut from one atlas and textures shipped twice decode to the same pixels
+                    pixel_hash = None
+                    if self.dedup != 'off':
+                        pixel_hash = hashlib.blake2b(f"{img.mode}{img.size}".encode() + img.tobytes(),
+                                                     digest_size=16).hexdigest()
+                    original = self._written_images.get(pixel_hash)
+                    if original is not None and original.exists():
+                        if self.dedup == 'index':
+                            record['duplicate_of'] = original.relative_to(self.output_dir).as_posix()
+                        else:
+                            link_or_copy(original, output_file)
+                        self.stats["images_deduplicated"] += 1
+                    else:
+                        # Save the image - a file hardlinked by an earlier run must not rewrite its twins
+                        output_file.unlink(missing_ok=True)
+                        encode_image(img, output_file, self.image_format, self.png_level)
+                        if pixel_hash:
+                            self._written_images[pixel_hash] = output_file
+                    assets[str(obj.path_id)] = record
+                    extracted_count += 1
+
+            except Exception as e:
+                continue
+
+        return extracted_count, skipped_count, assets
+
+    def _asset_exists(self, output_path, record):
+        if 'duplicate_of' in record:
+            return (Path(self.output_dir) / record['duplicate_of']).exists()
+        return (output_path / record['file']).exists()
+
+    def extract_parallel(self, jobs, workers=DEFAULT_WORKERS):
+        """
+        Extract (file_path, output_subdir) jobs across a process pool - image encoding is
+        CPU-bound. Bundles over LARGE_BUNDLE_BYTES are split into texture partitions,
+        each worker's stats are merged into self.stats.
+        """
+        tasks = []
+        for file_path, output_subdir in jobs:
+            size = os.path.getsize(file_path)
+            parts = min(workers, -(-size // LARGE_BUNDLE_BYTES)) if size > LARGE_BUNDLE_BYTES else 1
+            tasks += [(size / parts, file_path, output_subdir, part, parts) for part in range(parts)]
+        # Largest pieces first, so a big bundle never starts last and holds up the finish
+        tasks.sort(key=lambda task: task[0], reverse=True)
+
+        # Partitions of one bundle report back separately; its manifest entry is only
+        # completed once every partition succeeded, so a failed part is redone next run
+        pending_parts = {}
+        partition_names = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for _, file_path, output_subdir, part, parts in tasks:
+                key = bundle_key(file_path, output_subdir)
+                previous = {} if self.force else self.manifest['bundles'].get(key, {})
+                names = None
+                if parts > 1 and not self._bundle_current(previous, file_path,
+                                                          self._output_path(file_path, output_subdir)):
+                    if key not in partition_names:
+                        partition_names[key] = self._partition_names(file_path)
+                    names = partition_names[key]
+                future = pool.submit(_extract_part, self.output_dir, file_path, output_subdir, part, parts,
+                                     self.options(), previous, names)
+                futures[future] = (file_path, key, parts)
+            for future in as_completed(futures):
+                file_path, key, parts = futures[future]
+                try:
+                    worker_stats, entry = future.result()
+                except Exception as e:
+                    print(f"✗ {os.path.basename(file_path)} - Worker failed: {e}")
+                    self.stats["errors"] += 1
+                    worker_stats, entry = None, None
+                if worker_stats:
+                    for stat_name, value in worker_stats.items():
+                        self.stats[stat_name] += value
+
+                if parts == 1:
+                    if entry is not None:
+                        self.manifest['bundles'][key] = entry
+                    continue
+                collected = pending_parts.setdefault(key, {'done': 0, 'failed': False, 'unchanged': True, 'assets': {}})
+                collected['done'] += 1
+                collected['failed'] |= entry is None or worker_stats['errors'] > 0
+                if entry is not None:
+                    # Partitions of a changed bundle return assets only; a full record means "skipped"
+                    collected['unchanged'] &= 'hash' in entry
+                    collected['assets'].update(entry.get('assets', {}))
+                if collected['done'] < parts:
+                    continue
+                if collected['failed']:
+                    self.manifest['bundles'][key] = {'assets': collected['assets']}
+                elif collected['unchanged']:
+                    self.manifest['bundles'][key] = entry
+                else:
+                    self.manifest['bundles'][key] = bundle_record(file_path, collected['assets'],
+                                                                  self.image_format, self.dedup)
+
+    def print_summary(self, elapsed):
+        bundles_per_sec = self.stats['files_processed'] / elapsed if elapsed > 0 else 0.0
+        images_per_sec = self.stats['images_extracted'] / elapsed if elapsed > 0 else 0.0
+        print("\n=== EXTRACTION COMPLETE ===")
+        print(f"Files processed: {self.stats['files_processed']}")
+        print(f"Files unchanged (skipped): {self.stats['files_skipped']}")
+        print(f"Images extracted: {self.stats['images_extracted']}")
+        print(f"Images unchanged (skipped): {self.stats['images_skipped']}")
+        print(f"Duplicate images ({self.dedup}): {self.stats['images_deduplicated']}")
+        print(f"Errors: {self.stats['errors']}")
+        print(f"Time: {elapsed:.1f}s ({bundles_per_sec:.2f} bundles/sec, {images_per_sec:.1f} images/sec)")
+        print(f"Output directory: {self.output_dir}")
+
+    def extract_from_directory(self, source_dir, recursive=True, workers=1):
+        """Extract images from all Unity3D files in a directory, in parallel when workers > 1"""
         source_path = Path(source_dir)
 
         if not source_path.exists():
@@ -131,23 +517,38 @@ class UnityImageExtractor:
         # Create output directory
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
 
-        total_extracted = 0
-
+        jobs = []
         for file_path in unity_files:
             # Create relative output subdir based on source structure
             if recursive and file_path.parent != source_path:
-                relative_path = file_path.parent.relative_to(source_path)
-                extracted = self.extract_from_unity_file(str(file_path), str(relative_path))
+                jobs.append((str(file_path), str(file_path.parent.relative_to(source_path))))
             else:
-                extracted = self.extract_from_unity_file(str(file_path))
-
-            total_extracted += extracted
+                jobs.append((str(file_path), None))
 
-        print("\n=== EXTRACTION COMPLETE ===")
-        print(f"Files processed: {self.stats['files_processed']}")
-        print(f"Images extracted: {self.stats['images_extracted']}")
-        print(f"Errors: {self.stats['errors']}")
-        print(f"Output directory: {self.output_dir}")
+        start = time.perf_counter()
+        try:
+            if workers > 1:
+                print(f"Using {workers} worker processes")
+                self.extract_parallel(jobs, workers)
+            else:
+                for file_path, output_subdir in jobs:
+                    self.extract_from_unity_file(file_path, output_subdir)
+        finally:
+            # Keep what was finished, even if the run is interrupted
+            save_manifest(self.output_dir, self.manifest)
+
+        self.print_summary(time.perf_counter() - start)
+
+def _extract_part(output_dir, file_path, output_subdir, part, parts, options, previous, names=None):
+    """
+    Process pool entry point: extract one bundle (or one partition of it) given its
+    previous manifest entry, return (stats, new manifest entry or None).
+    Duplicate images are only found within one task - each has its own extractor.
+    """
+    key = bundle_key(file_path, output_subdir)
+    extractor = UnityImageExtractor(output_dir, manifest={'bundles': {key: previous}}, **options)
+    extractor.extract_from_unity_file(file_path, output_subdir, part, parts, names)
+    return extractor.stats, extractor.manifest['bundles'][key]
 
 def main():
     parser = argparse.ArgumentParser(description="Extract images from Unity3D files")
@@ -158,26 +559,45 @@ def main():
                        help="Recursively search subdirectories")
     parser.add_argument("--no-recursive", action="store_true",
                        help="Don't recursively search subdirectories")
+    parser.add_argument("--force", action="store_true",
+                       help=f"Re-extract everything, ignoring {MANIFEST_NAME} from earlier runs")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                       help=f"Worker processes for parallel extraction (default: 1, this PC: up to {DEFAULT_WORKERS})")
+    parser.add_argument("--format", choices=list(IMAGE_ENCODERS), default="png",
+                       help="Output encoder: png, webp (lossless) or raw RGBA bytes (default: png)")
+    parser.add_argument("--png-level", type=int, choices=range(10), default=DEFAULT_PNG_LEVEL, metavar="0-9",
+                       help=f"PNG compress level, 1 is much faster than the default (default: {DEFAULT_PNG_LEVEL})")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default="hardlink",
+                       help=f"Identical images: hardlink to the first copy, only list them in {MANIFEST_NAME} (index), or save each (off)")
 
     args = parser.parse_args()
 
     # Determine recursive behavior
     recursive = args.recursive or not args.no_recursive
 
-    extractor = UnityImageExtractor(args.output)
+    extractor = UnityImageExtractor(args.output, args.force, image_format=args.format,
+                                    png_level=args.png_level, dedup=args.dedup)
 
     source_path = Path(args.source)
 
     if source_path.is_file():
         if source_path.suffix.lower() == '.unity3d':
             print(f"Extracting from single file: {args.source}")
-            extractor.extract_from_unity_file(args.source)
+            try:
+                if args.workers > 1:
+                    start = time.perf_counter()
+                    extractor.extract_parallel([(args.source, None)], args.workers)
+                    extractor.print_summary(time.perf_counter() - start)
+                else:
+                    extractor.extract_from_unity_file(args.source)
+            finally:
+                save_manifest(extractor.output_dir, extractor.manifest)
         else:
             print("Error: File must have .unity3d extension")
             sys.exit(1)
     elif source_path.is_dir():
         print(f"Extracting from directory: {args.source}")
-        extractor.extract_from_directory(args.source, recursive)
+        extractor.extract_from_directory(args.source, recursive, args.workers)
     else:
         print(f"Error: {args.source} is not a valid file or directory")
         sys.exit(1)
@@ -11,6 +11,10 @@ import json
 from pathlib import Path
 from datetime import datetime
 
+# Shared ffprobe metadata cache lives in its own helper folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "media_probe"))
+import media_probe
+
 class CCExtractor:
     def __init__(self):
         self.ffmpeg_path = self.find_ffmpeg()
@@ -41,59 +45,23 @@ class CCExtractor:
         if not self.ffmpeg_path:
             raise RuntimeError("FFmpeg not found. Please install FFmpeg and add it to your PATH.")
 
-        cmd = [
-            self.ffmpeg_path, "-i", video_path,
-            "-f", "ffmetadata", "-"
-        ]
-
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        except subprocess.TimeoutExpired:
-            raise RuntimeError("Timeout while analyzing video file")
-
-        # Also try to get stream information
-        cmd_streams = [self.ffmpeg_path, "-i", video_path]
+        # One cached ffprobe call instead of parsing ffmpeg's stderr
         try:
-            result_streams = subprocess.run(cmd_streams, capture_output=True, text=True, timeout=30)
-            stderr_output = result_streams.stderr
-        except subprocess.TimeoutExpired:
-            stderr_output = ""
+            streams = media_probe.get_streams(video_path, 'subtitle', media_probe.find_ffprobe(self.ffmpeg_path))
+        except RuntimeError as e:
+            raise RuntimeError(f"Failed to analyze video file: {e}")
 
-        # Parse subtitle streams from stderr
         subtitle_tracks = []
-        lines = stderr_output.split('\n')
-
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if 'Subtitle:' in line or 'Stream #' in line and 'Subtitle' in line:
-                # Extract stream index and codec info
-                if 'Stream #' in line:
-                    try:
-                        # Parse stream info like: "Stream #0:3(eng): Subtitle: mov_text (tx3g / 0x67337874), 0 kb/s (default)"
-                        stream_part = line.split('Stream #')[1].split(':')[0:2]
-                        stream_index = f"0:{stream_part[1]}" if len(stream_part) > 1 else "unknown"
-
-                        # Look for language in parentheses
-                        lang_start = line.find('(')
-                        lang_end = line.find(')')
-                        language = "unknown"
-                        if lang_start != -1 and lang_end != -1 and lang_end > lang_start:
-                            language = line[lang_start+1:lang_end]
-
-                        # Look for codec info
-                        codec = "unknown"
-                        if 'Subtitle:' in line:
-                            codec_part = line.split('Subtitle:')[1].split(',')[0].strip()
-                            codec = codec_part
-
-                        subtitle_tracks.append({
-                            'index': stream_index,
-                            'language': language,
-                            'codec': codec,
-                            'description': line
-                        })
-                    except:
-                        continue
+        for stream in streams:
+            description = f"Stream #0:{stream['index']}({stream['language']}): Subtitle: {stream['codec']}"
+            if stream['title']:
+                description += f" - {stream['title']}"
+            subtitle_tracks.append({
+                'index': f"0:{stream['index']}",
+                'language': stream['language'],
+                'codec': stream['codec'],
+                'description': description
+            })
 
         return subtitle_tracks
 
@@ -120,6 +88,24 @@ class CCExtractor:
             print("Timeout while extracting subtitles")
             return False
 
+    def subtitle_output_paths(self, video_path, tracks, output_dir):
+        """
+        <video>_<language>_<codec>.srt in output_dir for each track. Tracks sharing
+        language and codec (e.g. two eng/subrip, several unknown) get the stream
+        index appended, so no two tracks write the same file.
+        """
+        names = []
+        for track in tracks:
+            language = track['language'] or 'unknown'
+            codec = track['codec'].replace('/', '_').replace(' ', '_')
+            names.append(f"{Path(video_path).stem}_{language}_{codec}")
+        paths = []
+        for name, track in zip(names, tracks):
+            if names.count(name) > 1:
+                name += f"_{track['index'].split(':')[-1]}"
+            paths.append(Path(output_dir) / f"{name}.srt")
+        return paths
+
     def extract_all_subtitles(self, video_path, output_dir=None):
         """Extract all subtitle tracks from a video file"""
         video_path = Path(video_path)
@@ -150,15 +136,10 @@ class CCExtractor:
         extracted_files = []
 
         # Extract each subtitle track
-        for track in subtitle_tracks:
+        output_paths = self.subtitle_output_paths(video_path, subtitle_tracks, output_dir)
+        for track, output_path in zip(subtitle_tracks, output_paths):
             stream_index = track['index'].split(':')[-1]  # Get just the number part
             language = track['language'] or 'unknown'
-            codec = track['codec'].replace('/', '_').replace(' ', '_')
-
-            # Generate output filename
-            base_name = video_path.stem
-            output_filename = f"{base_name}_{language}_{codec}.srt"
-            output_path = output_dir / output_filename
 
             print(f"\n📝 Extracting track {track['index']} ({language})...")
 
@@ -170,6 +151,85 @@ class CCExtractor:
 
         return extracted_files
 
+    def extract_all(self, video_path, output_dir=None):
+        """
+        Extract every subtitle track and the audio (as MP3) in one ffmpeg run, so the
+        video is demuxed once instead of once per track plus once for the audio.
+        Output names and folders are the same as extract_all_subtitles/extract_audio.
+        Returns (subtitle files, audio file or None).
+        """
+        if not self.ffmpeg_path:
+            raise RuntimeError("FFmpeg not found. Please install FFmpeg and add it to your PATH.")
+
+        video_path = Path(video_path)
+        if not video_path.exists():
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+
+        caption_dir = Path(output_dir) if output_dir else Path(__file__).parent / "extracted_captions"
+        audio_dir = Path(output_dir) if output_dir else Path(__file__).parent / "extracted_audio"
+
+        print(f"🔍 Analyzing video: {video_path.name}")
+
+        subtitle_tracks = self.get_subtitle_tracks(str(video_path))
+        # Same (cached) probe as the subtitle tracks; without an audio stream the
+        # MP3 output would have nothing mapped and fail the whole command
+        audio_streams = media_probe.get_streams(str(video_path), 'audio', media_probe.find_ffprobe(self.ffmpeg_path))
+
+        if subtitle_tracks:
+            print(f"📋 Found {len(subtitle_tracks)} subtitle track(s):")
+            for i, track in enumerate(subtitle_tracks, 1):
+                print(f"  {i}. Stream {track['index']} - {track['language']} ({track['codec']})")
+        else:
+            print("❌ No subtitle tracks found in this video")
+        if not audio_streams:
+            print("❌ No audio track found in this video")
+        if not subtitle_tracks and not audio_streams:
+            return [], None
+
+        # One input, one output per track: each output gets its own -map and options
+        cmd = [self.ffmpeg_path, "-y", "-i", str(video_path)]
+        subtitle_paths = self.subtitle_output_paths(video_path, subtitle_tracks, caption_dir)
+        for track, output_path in zip(subtitle_tracks, subtitle_paths):
+            cmd += ["-map", track['index'], "-f", "srt", str(output_path)]
+
+        audio_path = None
+        if audio_streams:
+            audio_path = audio_dir / f"{video_path.stem}.mp3"
+            cmd += [
+                "-map", "0:a:0",  # first audio stream
+                "-acodec", "libmp3lame",  # MP3 codec
+                "-q:a", "2",  # Quality (0-9, 2 is good)
+                str(audio_path)
+            ]
+
+        caption_dir.mkdir(exist_ok=True)
+        audio_dir.mkdir(exist_ok=True)
+
+        print(f"\n⏳ Extracting {len(subtitle_paths)} subtitle track(s){' and audio' if audio_path else ''} in one pass...")
+
+        try:
+            # Audio encoding dominates; allow the subtitle tracks' own timeouts on top
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300 + 60 * len(subtitle_paths))
+        except subprocess.TimeoutExpired:
+            result = None
+            print("⚠️ Timeout during single-pass extraction")
+        if result is None or result.returncode != 0:
+            # One unconvertible track fails the whole command - redo it a track at a time
+            if result is not None:
+                print(f"⚠️ Single-pass extraction failed, extracting tracks separately: {result.stderr[-500:]}")
+            for path in subtitle_paths + [audio_path]:
+                if path:
+                    path.unlink(missing_ok=True)
+            extracted_files = self.extract_all_subtitles(video_path, output_dir) if subtitle_tracks else []
+            audio_file = self.extract_audio(video_path, output_dir) if audio_streams else None
+            return extracted_files, audio_file
+
+        for path in subtitle_paths:
+            print(f"✅ Saved: {path.name}")
+        if audio_path:
+            print(f"✅ Audio extracted: {audio_path.name}")
+        return [str(path) for path in subtitle_paths], str(audio_path) if audio_path else None
+
     def extract_audio(self, video_path, output_dir=None):
         """Extract audio from video file as MP3"""
         if not self.ffmpeg_path:
@@ -235,11 +295,8 @@ def main():
             print("Download from: https://ffmpeg.org/download.html")
             sys.exit(1)
 
-        extracted_files = extractor.extract_all_subtitles(video_path, output_dir)
-
-        # Always extract audio as MP3
-        print(f"\n🎵 Extracting audio from: {Path(video_path).name}")
-        audio_file = extractor.extract_audio(video_path, output_dir)
+        # Subtitles and MP3 audio in a single ffmpeg pass over the video
+        extracted_files, audio_file = extractor.extract_all(video_path, output_dir)
 
         if extracted_files:
             print(f"\n✅ Extraction complete! {len(extracted_files)} subtitle file(s) created:")
@@ -7,13 +7,70 @@ Automatically optimizes conversion based on user-specified size and speed constr
 import os
 import sys
 import math
+import time
+import tempfile
+import subprocess
 from pathlib import Path
 import moviepy as mp
 from PIL import Image
 import argparse
 
+# Shared ffprobe metadata cache lives in its own helper folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "media_probe"))
+import media_probe
+
+# Size solver: a few short bursts of output frames are encoded at candidate scales,
+# a size-vs-pixels curve is fitted and bisected, then the full GIF is encoded once.
+SAMPLE_BURSTS = 3           # bursts spread over the clip
+SAMPLE_BURST_FRAMES = 8     # consecutive frames per burst (keeps inter-frame behaviour)
+SAMPLE_SCALE_FACTORS = (0.6, 1.0, 1.6)  # candidate scales relative to the first estimate
+TARGET_FILL = 0.97          # aim slightly under the limit to absorb prediction error
+UNDERSHOOT_FILL = 0.9       # a full encode under this share of the limit gets one step up in resolution
+
+# GIF engines: moviepy quantizes every frame in Python (imageio/PIL); ffmpeg builds a
+# palette in one pass (palettegen) and maps frames to it in a second (paletteuse)
+GIF_ENGINES = ('moviepy', 'ffmpeg')
+FFMPEG_DITHERS = ('sierra2_4a', 'sierra2', 'floyd_steinberg', 'bayer', 'none')
+PALETTE_STATS_MODE = 'diff'  # favour colours of moving areas over static background
+
+def gif_frame_sizes(gif_path):
+    """
+    Bytes of each frame in a GIF (image data plus the extensions in front of it),
+    and the bytes of everything else (header, global palette, trailer)
+    """
+    with open(gif_path, 'rb') as f:
+        data = f.read()
+
+    def skip_sub_blocks(pos):
+        while data[pos]:
+            pos += data[pos] + 1
+        return pos + 1
+
+    pos = 13  # header + logical screen descriptor
+    if data[10] & 0x80:
+        pos += 3 << ((data[10] & 0x07) + 1)  # global colour table
+    overhead = pos
+    frames = []
+    frame_start = pos
+    while pos < len(data) and data[pos] != 0x3B:
+        if data[pos] == 0x21:  # extension: label, then sub-blocks
+            pos = skip_sub_blocks(pos + 2)
+        elif data[pos] == 0x2C:  # image descriptor, local colour table, LZW data
+            flags = data[pos + 9]
+            pos += 10
+            if flags & 0x80:
+                pos += 3 << ((flags & 0x07) + 1)
+            pos = skip_sub_blocks(pos + 1)
+            frames.append(pos - frame_start)
+            frame_start = pos
+        else:
+            break  # truncated or unknown block: count the rest as overhead
+    return frames, len(data) - sum(frames)
+
 class GIFConverter:
-    def __init__(self):
+    def __init__(self, engine='moviepy', dither='sierra2_4a'):
+        self.engine = engine
+        self.dither = dither
         self.video_info = None
         self.size_constraint_mb = None
         self.speed_constraint_ratio = None
@@ -25,21 +82,30 @@ class GIFConverter:
 
         print("🔍 Analyzing video...")
         try:
-            clip = mp.VideoFileClip(mp4_path)
+            try:
+                # ffprobe (cached) reads metadata without decoding any frames
+                probed = media_probe.get_video_info(mp4_path)
+                duration, fps = probed['duration'], probed['fps']
+                width, height = probed['width'], probed['height']
+            except (RuntimeError, KeyError):
+                # No ffprobe or incomplete metadata - fall back to opening the clip
+                clip = mp.VideoFileClip(mp4_path)
+                duration, fps, width, height = clip.duration, clip.fps, clip.w, clip.h
+                clip.close()
+
             self.video_info = {
                 'path': mp4_path,
-                'duration': clip.duration,
-                'fps': clip.fps,
-                'width': clip.w,
-                'height': clip.h,
-                'total_frames': int(clip.duration * clip.fps),
+                'duration': duration,
+                'fps': fps,
+                'width': width,
+                'height': height,
+                'total_frames': int(duration * fps),
                 'file_size_mb': os.path.getsize(mp4_path) / (1024 * 1024)
             }
-            clip.close()
 
             print("✅ Video analysis complete!")
             print(f"   Duration: {self.video_info['duration']:.2f}s")
-            print(f"   Original FPS: {self.video_info['fps']}")
+            print(f"   Original FPS: {self.video_info['fps']:.2f}")
             print(f"   Resolution: {self.video_info['width']}x{self.video_info['height']}")
             print(f"   Total frames: {self.video_info['total_frames']}")
             print(f"   File size: {self.video_info['file_size_mb']:.1f} MB")
@@ -77,7 +143,7 @@ class GIFConverter:
         return True
 
     def calculate_optimal_settings(self):
-        """Calculate optimal FPS and resolution based on constraints with accurate estimation"""
+        """Calculate FPS and a first resolution estimate; solve_resolution refines it from sample encodes"""
         if not self.video_info or not self.size_constraint_mb or not self.speed_constraint_ratio:
             raise RuntimeError("Video analysis and constraints must be set first")
 
@@ -168,10 +234,166 @@ class GIFConverter:
         print(f"   Estimated size: {settings['estimated_size_mb']:.1f} MB (target: {self.size_constraint_mb} MB)")
         return settings
 
-    def convert_video(self, output_path=None):
-        """Perform the conversion with constraints and create both optimized and original versions"""
+    def _sample_windows(self, duration, fps):
+        """Short bursts of consecutive frames spread across the (speed adjusted) timeline"""
+        burst = SAMPLE_BURST_FRAMES / fps
+        if duration <= burst * SAMPLE_BURSTS * 2:
+            return None, int(duration * fps)
+
+        starts = [duration * (i + 0.5) / SAMPLE_BURSTS - burst / 2 for i in range(SAMPLE_BURSTS)]
+        return [(t, t + burst) for t in starts], SAMPLE_BURSTS * SAMPLE_BURST_FRAMES
+
+    def write_gif(self, output_path, width, height, fps, speed=None, windows=None, engine=None):
+        """
+        Encode the source video to GIF with the chosen engine.
+        windows limits the output to (start, end) ranges of the speed adjusted timeline.
+        """
+        speed = self.speed_constraint_ratio if speed is None else speed
+        engine = engine or self.engine
+        if engine == 'ffmpeg':
+            self._write_gif_ffmpeg(output_path, width, height, fps, speed, windows)
+        else:
+            self._write_gif_moviepy(output_path, width, height, fps, speed, windows)
+
+    def _write_gif_moviepy(self, output_path, width, height, fps, speed, windows):
+        clip = mp.VideoFileClip(self.video_info['path'])
+        try:
+            gif_clip = clip
+            if speed != 1.0:
+                gif_clip = gif_clip.with_speed_scaled(speed)
+            if windows:
+                gif_clip = mp.concatenate_videoclips([gif_clip.subclipped(a, b) for a, b in windows])
+            if gif_clip.w != width or gif_clip.h != height:
+                gif_clip = gif_clip.resized(width=width, height=height)
+            gif_clip.write_gif(output_path, fps=fps, logger=None if windows else 'bar')
+        finally:
+            clip.close()
+
+    def _write_gif_ffmpeg(self, output_path, width, height, fps, speed, windows):
+        """Two FFmpeg passes over the same filter chain: palettegen, then paletteuse - no frames in Python"""
+        filters = [f"setpts=PTS/{speed}", f"fps={fps}"]
+        if windows:
+            between = '+'.join(f"between(t,{a:.3f},{b:.3f})" for a, b in windows)
+            filters += [f"select='{between}'", f"setpts=N/({fps}*TB)"]
+        filters.append(f"scale={width}:{height}:flags=lanczos")
+        chain = ','.join(filters)
+
+        source = self.video_info['path']
+        timeout = max(300, int(self.video_info['duration'] / speed * 10))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            palette_path = os.path.join(temp_dir, 'palette.png')
+            passes = [
+                ['-i', source, '-vf', f"{chain},palettegen=stats_mode={PALETTE_STATS_MODE}", palette_path],
+                ['-i', source, '-i', palette_path,
+                 '-lavfi', f"[0:v]{chain}[x];[x][1:v]paletteuse=dither={self.dither}:diff_mode=rectangle",
+                 '-loop', '0', output_path],
+            ]
+            for args in passes:
+                cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y'] + args
+                try:
+                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+                except FileNotFoundError:
+                    raise RuntimeError("FFmpeg not found on PATH (needed for --engine ffmpeg)")
+                if result.returncode != 0:
+                    raise RuntimeError(f"FFmpeg GIF encode failed: {result.stderr.strip()}")
+
+    def _amortized_frame_bytes(self, sample_path, sample_frames, total_frames, bursts):
+        """
+        Bytes per frame of the full GIF as estimated from a sample encode. Every burst
+        starts with a near full-size frame, while the full GIF has only one, so burst
+        openers are measured apart and spread over total_frames instead of counted per burst.
+        """
+        try:
+            frames, overhead = gif_frame_sizes(sample_path)
+        except IndexError:
+            frames = []
+        if not frames:
+            return os.path.getsize(sample_path) / max(1, sample_frames)
+
+        step = SAMPLE_BURST_FRAMES if bursts else len(frames)
+        openers = frames[::step]
+        rest = [size for i, size in enumerate(frames) if i % step]
+        opener_bytes = sum(openers) / len(openers)
+        inter_bytes = sum(rest) / len(rest) if rest else opener_bytes
+        total_frames = max(1, total_frames)
+        return (overhead + opener_bytes + inter_bytes * (total_frames - 1)) / total_frames
+
+    def predict_gif_size(self, settings):
+        """
+        Fit GIF bytes per frame as c * pixels^k from sample encodes at 2-3 scales.
+        Returns a function mapping (width, height) to the predicted full GIF size in MB.
+        """
+        fps = settings['fps']
+        total_frames = settings['estimated_frames']
+        windows, sample_frames = self._sample_windows(settings['estimated_duration'], fps)
+
+        points = []
+        tried = set()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for factor in SAMPLE_SCALE_FACTORS:
+                width = min(self.video_info['width'], max(16, int(settings['width'] * factor)))
+                height = min(self.video_info['height'], max(16, int(settings['height'] * factor)))
+                if (width, height) in tried:
+                    continue
+                tried.add((width, height))
+
+                sample_path = os.path.join(temp_dir, f"sample_{width}x{height}.gif")
+                self.write_gif(sample_path, width, height, fps, windows=windows)
+                bytes_per_frame = self._amortized_frame_bytes(sample_path, sample_frames, total_frames, bool(windows))
+                points.append((width * height, bytes_per_frame))
+                print(f"   Sample {width}x{height}: {bytes_per_frame / 1024:.1f} KB/frame")
+
+        # Least squares in log space: log(bytes) = log(c) + k * log(pixels)
+        xs = [math.log(p) for p, _ in points]
+        ys = [math.log(b) for _, b in points]
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        spread = sum((x - mean_x) ** 2 for x in xs)
+        k = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 1.0
+        k = max(0.3, min(1.5, k))  # guard against a noisy fit
+        log_c = mean_y - k * mean_x
+
+        def predict(width, height):
+            return math.exp(log_c) * (width * height) ** k * total_frames / (1024 * 1024)
+
+        return predict
+
+    def solve_resolution(self, settings):
+        """Bisect the output scale so the predicted size lands just under the limit"""
+        print("\n📐 Sampling frames to fit a size model...")
+        predict = self.predict_gif_size(settings)
+        target_mb = self.size_constraint_mb * TARGET_FILL
+        width, height = self.video_info['width'], self.video_info['height']
+
+        def dims(scale):
+            return max(16, int(width * scale)), max(16, int(height * scale))
+
+        low, high = 0.0, 1.0
+        if predict(*dims(high)) <= target_mb:
+            low = high
+        else:
+            for _ in range(30):
+                mid = (low + high) / 2
+                if predict(*dims(mid)) <= target_mb:
+                    low = mid
+                else:
+                    high = mid
+
+        solved = settings.copy()
+        solved['width'], solved['height'] = dims(low)
+        solved['estimated_size_mb'] = predict(*dims(low))
+        print(f"   Solved resolution: {solved['width']}x{solved['height']} "
+              f"(predicted {solved['estimated_size_mb']:.2f} MB, target {self.size_constraint_mb} MB)")
+        return solved
+
+    def convert_video(self, output_path=None, engine=None, create_original=None):
+        """
+        Perform the conversion with constraints and create both optimized and original versions.
+        create_original=None asks interactively whether to write the original quality version.
+        """
         if not self.video_info:
             raise RuntimeError("Video must be analyzed first")
+        if engine:
+            self.engine = engine
 
         settings = self.calculate_optimal_settings()
 
@@ -194,107 +416,79 @@ class GIFConverter:
         print(f"   Input: {self.video_info['path']}")
         print(f"   Optimized output: {optimized_path}")
         print(f"   Original output: {original_path}")
-        print("\n⏳ GIF conversion is slow because:")
-        print("   • Each frame is processed individually")
-        print("   • GIF format requires color palette generation per frame")
-        print("   • No video compression (each frame stored as full image)")
-        print("   • This is normal - please be patient...")
+        print(f"   Engine: {self.engine}")
+        if self.engine == 'moviepy':
+            print("\n⏳ GIF conversion is slow because:")
+            print("   • Each frame is processed individually")
+            print("   • GIF format requires color palette generation per frame")
+            print("   • No video compression (each frame stored as full image)")
+            print("   • This is normal - please be patient... (--engine ffmpeg is much faster)")
 
         try:
-            # Load video once
-            clip = mp.VideoFileClip(self.video_info['path'])
-            original_clip = clip.copy()  # Keep original for second conversion
-
-            # ITERATIVE APPROACH: Keep reducing resolution until size is under limit
-            current_settings = settings.copy()
-            iteration = 0
-            max_iterations = 5
-            original_fps = self.video_info['fps']  # Store original FPS for speed adjustments
-
-            while iteration < max_iterations:
-                iteration += 1
-                print(f"\n📏 Creating optimized version (attempt {iteration})...")
-
-                # Create a fresh copy for each attempt
-                opt_clip = clip.copy()
-
-                # Apply speed adjustment by changing duration proportionally
-                if self.speed_constraint_ratio != 1.0:
-                    opt_clip = opt_clip.with_speed_scaled(self.speed_constraint_ratio)
-                    print(f"   Speed adjusted to {self.speed_constraint_ratio}x (duration: {opt_clip.duration:.2f}s)")
-
-                # Resize if needed for optimized version
-                if opt_clip.w > current_settings['width'] or opt_clip.h > current_settings['height']:
-                    opt_clip = opt_clip.resized(width=current_settings['width'], height=current_settings['height'])
+            # Speed is applied by changing duration proportionally
+            if self.speed_constraint_ratio != 1.0:
+                print(f"   Speed adjusted to {self.speed_constraint_ratio}x (duration: {settings['estimated_duration']:.2f}s)")
+
+            current_settings = self.solve_resolution(settings)
+
+            # One full encode; a second one only if the result overshot the limit or
+            # landed well under it (then the smaller GIF is kept in case the larger one overshoots)
+            max_attempts = 2
+            fallback_path = str(Path(optimized_path).with_name(f"{Path(optimized_path).stem}.smaller.gif"))
+            fallback_settings = None
+            for attempt in range(1, max_attempts + 1):
+                print(f"\n📏 Creating optimized version (attempt {attempt})...")
+                if (current_settings['width'], current_settings['height']) != (self.video_info['width'], self.video_info['height']):
                     print(f"   Resized to {current_settings['width']}x{current_settings['height']}")
-
-                # Convert optimized version to GIF
                 print(f"   Converting optimized at {current_settings['fps']} FPS...")
-                opt_clip.write_gif(optimized_path, fps=current_settings['fps'])
-
-                # Close this attempt's clip
-                opt_clip.close()
+                self.write_gif(optimized_path, current_settings['width'], current_settings['height'], current_settings['fps'])
 
-                # Verify the result
                 result_info = self.verify_conversion(optimized_path, current_settings)
                 actual_size_mb = result_info['size_mb']
-
-                print(f"   Attempt {iteration} result: {actual_size_mb:.2f} MB (target: {self.size_constraint_mb} MB)")
-
-                # If we're within limit and not too far below target, accept
-                undershoot_threshold = 0.95  # accept if >= 95% of target
-                if actual_size_mb <= self.size_constraint_mb and actual_size_mb >= self.size_constraint_mb * undershoot_threshold:
-                    print(f"   ✅ Size constraint met on attempt {iteration} within acceptable undershoot ({actual_size_mb:.2f} MB)")
-                    break
-
-                # If under target but too small (undershoot), try increasing resolution moderately
-                if actual_size_mb < self.size_constraint_mb * undershoot_threshold and iteration < max_iterations:
-                    # Increase resolution by 25% to get closer to target without exceeding
-                    increase_factor = 1.25
-                    # Cap at original video resolution
-                    current_settings['width'] = min(self.video_info['width'], int(current_settings['width'] * increase_factor))
-                    current_settings['height'] = min(self.video_info['height'], int(current_settings['height'] * increase_factor))
-                    print(f"   🔧 Undershot target by >5%, increasing resolution to {current_settings['width']}x{current_settings['height']} for next attempt...")
-
-                    # Remove the small file before next attempt
-                    if os.path.exists(optimized_path):
-                        os.remove(optimized_path)
-                    continue
-
-                # If over limit and not last iteration, reduce resolution
-                if actual_size_mb > self.size_constraint_mb and iteration < max_iterations:
-                    reduction_factor = 0.8
-                    current_settings['width'] = max(40, int(current_settings['width'] * reduction_factor))
-                    current_settings['height'] = max(22, int(current_settings['height'] * reduction_factor))
-                    print(f"   ⚠️  Size over limit, reducing resolution to {current_settings['width']}x{current_settings['height']} for next attempt...")
-
-                    # Remove the oversized file
-                    if os.path.exists(optimized_path):
-                        os.remove(optimized_path)
+                print(f"   Attempt {attempt} result: {actual_size_mb:.2f} MB (target: {self.size_constraint_mb} MB)")
+
+                # Bytes scale roughly with pixel count: resize both sides by the square root
+                correction = math.sqrt(self.size_constraint_mb * TARGET_FILL / actual_size_mb)
+                if actual_size_mb <= self.size_constraint_mb:
+                    print(f"   ✅ Size constraint met ({actual_size_mb:.2f} MB)")
+                    if attempt == max_attempts or actual_size_mb >= self.size_constraint_mb * UNDERSHOOT_FILL:
+                        break
+                    width = min(self.video_info['width'], int(current_settings['width'] * correction))
+                    height = min(self.video_info['height'], int(current_settings['height'] * correction))
+                    if (width, height) == (current_settings['width'], current_settings['height']):
+                        break
+                    fallback_settings = current_settings.copy()
+                    os.replace(optimized_path, fallback_path)
+                    current_settings['width'], current_settings['height'] = width, height
+                    print(f"   ⬆️  Well under the limit, raising resolution to {width}x{height}...")
+                elif fallback_settings:
+                    # The step up overshot: the earlier, smaller GIF is the result
+                    os.replace(fallback_path, optimized_path)
+                    current_settings = fallback_settings
+                    print(f"   ⚠️  Larger version over limit, keeping {current_settings['width']}x{current_settings['height']}")
+                elif attempt < max_attempts:
+                    current_settings['width'] = max(16, int(current_settings['width'] * correction))
+                    current_settings['height'] = max(16, int(current_settings['height'] * correction))
+                    print(f"   ⚠️  Size over limit, correcting resolution to {current_settings['width']}x{current_settings['height']}...")
+                    os.remove(optimized_path)
                 else:
-                    # Either we reached acceptable size or max iterations
-                    if actual_size_mb > self.size_constraint_mb:
-                        print(f"   ⚠️  Maximum iterations reached. Final size: {actual_size_mb:.2f} MB (over {self.size_constraint_mb} MB limit)")
-                    else:
-                        print(f"   ✅ Final size after iterations: {actual_size_mb:.2f} MB")
+                    print(f"   ⚠️  Final size: {actual_size_mb:.2f} MB (over {self.size_constraint_mb} MB limit)")
+            if os.path.exists(fallback_path):
+                os.remove(fallback_path)
 
             # Now create original version if requested
-            create_original = input("\n🎬 Create original quality version? (y/n): ").lower().strip() == 'y'
+            if create_original is None:
+                create_original = input("\n🎬 Create original quality version? (y/n): ").lower().strip() == 'y'
 
             if create_original:
                 print("\n🎬 Creating original quality version...")
                 # Convert original version to GIF
                 print(f"   Converting original at {self.video_info['fps']} FPS...")
-                original_clip.write_gif(original_path, fps=self.video_info['fps'])
-
-                # Close clips
-                original_clip.close()
+                self.write_gif(original_path, self.video_info['width'], self.video_info['height'],
+                               self.video_info['fps'], speed=1.0)
             else:
                 print("\n⏭️  Skipping original quality version")
 
-            # Close main clips
-            clip.close()
-
             # Final verification and results
             final_result = self.verify_conversion(optimized_path, current_settings)
 
@@ -328,6 +522,34 @@ class GIFConverter:
             print(f"   ❌ Conversion failed: {e}")
             raise
 
+    def benchmark_engines(self, output_dir=None):
+        """Encode the same solved settings with every engine and compare wall time and size"""
+        if not self.video_info:
+            raise RuntimeError("Video must be analyzed first")
+
+        settings = self.solve_resolution(self.calculate_optimal_settings())
+        output_dir = Path(output_dir) if output_dir else Path(__file__).parent / "extracted_gifs"
+        output_dir.mkdir(exist_ok=True)
+        video_name = Path(self.video_info['path']).stem
+
+        results = {}
+        for engine in GIF_ENGINES:
+            gif_path = str(output_dir / f"{video_name}_bench_{engine}.gif")
+            print(f"\n⏱️  Benchmarking {engine}...")
+            start = time.time()
+            self.write_gif(gif_path, settings['width'], settings['height'], settings['fps'], engine=engine)
+            elapsed = time.time() - start
+            results[engine] = {'seconds': elapsed, 'size_mb': os.path.getsize(gif_path) / (1024 * 1024), 'path': gif_path}
+
+        print(f"\n📊 GIF engine benchmark ({settings['width']}x{settings['height']} @ {settings['fps']:.2f} FPS):")
+        print(f"   {'Engine':<10}{'Time':>10}{'Size':>12}")
+        for engine, result in results.items():
+            print(f"   {engine:<10}{result['seconds']:>9.1f}s{result['size_mb']:>9.2f} MB")
+        baseline = results['moviepy']['seconds']
+        if results['ffmpeg']['seconds'] > 0:
+            print(f"   ffmpeg speedup: {baseline / results['ffmpeg']['seconds']:.1f}x")
+        return results
+
     def verify_conversion(self, gif_path, expected_settings):
         """Verify the converted GIF meets expectations"""
         try:
@@ -458,13 +680,22 @@ if __name__ == "__main__":
         parser.add_argument("-s", "--size", type=float, required=True, help="Size limit in MB")
         parser.add_argument("-p", "--speed", type=float, required=True, help="Speed ratio (1.0 = original)")
         parser.add_argument("-o", "--output", help="Output GIF file")
+        parser.add_argument("--engine", choices=GIF_ENGINES, default='moviepy',
+                            help="GIF encoder: moviepy (default) or ffmpeg palettegen/paletteuse")
+        parser.add_argument("--dither", choices=FFMPEG_DITHERS, default='sierra2_4a',
+                            help="Dither used by the ffmpeg engine (default: sierra2_4a)")
+        parser.add_argument("--benchmark", action="store_true",
+                            help="Encode with both engines and compare wall time and size")
 
         args = parser.parse_args()
 
-        converter = GIFConverter()
+        converter = GIFConverter(engine=args.engine, dither=args.dither)
         try:
             converter.analyze_video(args.input)
             converter.validate_constraints(args.size, args.speed)
+            if args.benchmark:
+                converter.benchmark_engines(Path(args.output).parent if args.output else None)
+                sys.exit(0)
             optimized_path, original_path, result_info = converter.convert_video(args.output)
             print(f"✅ Conversion complete!")
             print(f"   Optimized: {optimized_path}")
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the helper tools
+Generates synthetic inputs locally (FFmpeg testsrc video with subtitle tracks,
+sine/noise audio, random images, wrapped Unity bundles), times the key stage of
+every tool and writes JSON results that can be compared against a saved baseline.
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import time
+import wave
+import array
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import contextlib
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+INPUTS_DIR = BENCH_DIR / "inputs"
+RESULTS_DIR = BENCH_DIR / "results"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+# Every tool lives in its own folder; make them importable side by side
+TOOL_DIRS = ["media_probe", "video_upscaler", "image_upscaler", "Video_to_GIF_Converter",
+             "Audio_to_Text_Transcriber", "Video-subtitle&mp3-extractor", "Unity_Image_Extractor"]
+for tool_dir in TOOL_DIRS:
+    sys.path.insert(0, str(ROOT_DIR / tool_dir))
+
+# Synthetic input sizes - small enough for a quick run, large enough to time reliably
+VIDEO_SECONDS = 10
+VIDEO_SIZE = "640x360"
+VIDEO_FPS = 30
+SUBTITLE_LANGUAGES = ("eng", "fra")
+AUDIO_SECONDS = 120
+AUDIO_RATE = 16000
+IMAGE_COUNT = 8
+IMAGE_SIZE = 256
+UPSCALE_FRAMES = 30
+UNITY_COPIES = 8
+PROBE_CALLS = 5
+CACHED_INFO_CALLS = 200
+SEED = 1234
+
+# A stage counts as regressed when its throughput drops by more than this share
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+STAGES = ("probe", "video_info", "extract_frames", "upscale_loop", "image_upscale",
+          "gif", "audio_chunks", "cc_extract", "cc_single_pass", "unity")
+
+class StageSkipped(Exception):
+    """Raised by a stage whose tool, dependency or input is unavailable"""
+
+# ---------------------------------------------------------------------------
+# Synthetic inputs
+# ---------------------------------------------------------------------------
+
+def run_ffmpeg(args):
+    if not shutil.which("ffmpeg"):
+        raise StageSkipped("ffmpeg not found in PATH")
+    result = subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"] + args,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise StageSkipped(f"ffmpeg failed: {result.stderr.strip()[-200:]}")
+
+def write_srt(path, seconds):
+    """One cue per second, enough for a real subtitle stream"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(seconds):
+            f.write(f"{i + 1}\n00:00:{i:02d},000 --> 00:00:{i:02d},900\nCue {i + 1}\n\n")
+
+def make_video(path):
+    """testsrc video + sine audio + one mov_text subtitle track per language"""
+    srt_path = path.with_suffix(".srt")
+    write_srt(srt_path, VIDEO_SECONDS)
+    args = ["-f", "lavfi", "-i", f"testsrc=size={VIDEO_SIZE}:rate={VIDEO_FPS}",
+            "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100"]
+    for _ in SUBTITLE_LANGUAGES:
+        args += ["-i", str(srt_path)]
+    args += ["-t", str(VIDEO_SECONDS), "-map", "0:v", "-map", "1:a"]
+    for i, language in enumerate(SUBTITLE_LANGUAGES):
+        args += ["-map", f"{i + 2}:s", f"-metadata:s:s:{i}", f"language={language}"]
+    args += ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-g", str(VIDEO_FPS * 2),
+             "-c:a", "aac", "-c:s", "mov_text", str(path)]
+    try:
+        run_ffmpeg(args)
+    finally:
+        # The cues are muxed into the video; the source .srt is not an input of its own
+        srt_path.unlink(missing_ok=True)
+
+def make_audio(path):
+    """16 kHz mono WAV: tone + noise bursts separated by near-silent pauses, so VAD has cuts to find"""
+    rng = random.Random(SEED)
+    samples = array.array("h")
+    total = AUDIO_SECONDS * AUDIO_RATE
+    while len(samples) < total:
+        burst = int(rng.uniform(2.0, 5.0) * AUDIO_RATE)
+        frequency = rng.uniform(120, 400)
+        for n in range(burst):
+            value = 0.4 * math.sin(2 * math.pi * frequency * n / AUDIO_RATE) + rng.uniform(-0.1, 0.1)
+            samples.append(int(value * 32767))
+        for _ in range(int(rng.uniform(0.5, 1.5) * AUDIO_RATE)):
+            samples.append(int(rng.uniform(-0.002, 0.002) * 32767))
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(AUDIO_RATE)
+        f.writeframes(samples[:total].tobytes())
+
+def make_images(image_dir):
+    try:
+        import cv2
+        import numpy as np
+    except ImportError as e:
+        raise StageSkipped(f"{e} (pip install opencv-python numpy)")
+    image_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(SEED)
+    for i in range(IMAGE_COUNT):
+        # Smooth gradients plus noise: closer to photos than pure noise, still random
+        gradient = np.linspace(0, 255, IMAGE_SIZE, dtype=np.float32)
+        base = (gradient[None, :, None] + gradient[:, None, None] * (i % 3)) / (1 + i % 3)
+        noise = rng.normal(0, 25, (IMAGE_SIZE, IMAGE_SIZE, 3))
+        cv2.imwrite(str(image_dir / f"random_{i:02d}.png"), np.clip(base + noise, 0, 255).astype(np.uint8))
+
+def make_unity_bundles(bundle_dir, sample_bundle):
+    """
+    Copies of a real UnityFS bundle behind random junk prefixes, like the wrapped
+    game files the extractor searches for the 'UnityFS' signature.
+    """
+    if not sample_bundle:
+        raise StageSkipped("no sample bundle given (--unity-sample path\\to\\file.unity3d)")
+    data = Path(sample_bundle).read_bytes()
+    if b"UnityFS" not in data:
+        raise StageSkipped(f"{sample_bundle} has no UnityFS signature")
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(SEED)
+    for i in range(UNITY_COPIES):
+        prefix = bytes(rng.getrandbits(8) for _ in range(rng.randint(0, 4096))).replace(b"UnityFS", b"XXXXXXX")
+        (bundle_dir / f"bundle_{i:02d}.unity3d").write_bytes(prefix + data)
+
+def ensure_input(path, make, *args):
+    """Build a synthetic input once; later runs reuse it so results stay comparable"""
+    if not path.exists():
+        # Build under a temp name so a failed run never leaves a half-written input behind
+        temp_path = path.with_name(f"partial_{path.name}")
+        make(temp_path, *args)
+        os.replace(temp_path, path)
+    return path
+
+# ---------------------------------------------------------------------------
+# Stages - each returns (items, unit, seconds[, extra]) for the timed part only
+# ---------------------------------------------------------------------------
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def stage_probe(ctx):
+    import media_probe
+    video = ensure_input(INPUTS_DIR / "testsrc.mp4", make_video)
+    start = time.perf_counter()
+    for _ in range(PROBE_CALLS):
+        media_probe.probe(video, use_cache=False)
+    return PROBE_CALLS, "probes", time.perf_counter() - start
+
+def stage_video_info(ctx):
+    import video_upscaler
+    video = ensure_input(INPUTS_DIR / "testsrc.mp4", make_video)
+    video_upscaler.get_video_info(video)  # warm the ffprobe cache
+    start = time.perf_counter()
+    for _ in range(CACHED_INFO_CALLS):
+        video_upscaler.get_video_info(video)
+    return CACHED_INFO_CALLS, "calls", time.perf_counter() - start
+
+def stage_extract_frames(ctx):
+    import video_upscaler
+    video = ensure_input(INPUTS_DIR / "testsrc.mp4", make_video)
+    frames_dir, seconds = timed(video_upscaler.extract_frames_only, video, ctx['work_dir'])
+    ctx['frames_dir'] = frames_dir
+    return len(list(frames_dir.glob("*.png"))), "frames", seconds
+
+def stage_upscale_loop(ctx):
+    import video_upscaler
+    frames_dir = ctx.get('frames_dir')
+    if frames_dir is None:
+        raise StageSkipped("needs the extract_frames stage")
+    frame_files = sorted(frames_dir.glob("*.png"))[:UPSCALE_FRAMES]
+    upscaled_dir = ctx['work_dir'] / "upscaled"
+    shutil.rmtree(upscaled_dir, ignore_errors=True)
+    upscaled_dir.mkdir()
+    if not ctx['gpu']:
+        import cv2  # CPU lanes need OpenCV; without it the stage is skipped
+    script_dir = ROOT_DIR / "video_upscaler"
+    realesrgan_exe = script_dir / "realesrgan-windows" / "realesrgan-ncnn-vulkan.exe"
+    if ctx['gpu']:
+        if not realesrgan_exe.exists():
+            raise StageSkipped(f"Real-ESRGAN not found: {realesrgan_exe}")
+        lanes = {'gpu_workers': 1, 'cpu_workers': 0}
+    else:
+        lanes = {'gpu_workers': 0, 'cpu_workers': max(1, (os.cpu_count() or 2) // 2)}
+    done, seconds = timed(video_upscaler.upscale_frames_scheduled, realesrgan_exe, frames_dir, upscaled_dir, 2,
+                          "realesr-animevideov3-x2", script_dir, lanes=lanes, frame_files=frame_files)
+    lane = "gpu" if ctx['gpu'] else f"cpu x{lanes['cpu_workers']}"
+    return done, "frames", seconds, {'lane': lane}
+
+def stage_image_upscale(ctx):
+    import opencv_edsr
+    image_dir = INPUTS_DIR / "images"
+    if not image_dir.exists():
+        make_images(image_dir)
+    images = opencv_edsr.collect_images(str(image_dir))
+    stats, seconds = timed(opencv_edsr.enhance_batch, images, 2, str(ctx['work_dir'] / "images_x2"),
+                           force=True, cache=None)
+    return stats['done'], "images", seconds
+
+def stage_gif(ctx):
+    from converter import GIFConverter
+    video = ensure_input(INPUTS_DIR / "testsrc.mp4", make_video)
+    converter = GIFConverter(engine=ctx['gif_engine'])
+    converter.analyze_video(str(video))
+    converter.validate_constraints(5, 1.0)
+    _, seconds = timed(converter.convert_video, str(ctx['work_dir'] / "testsrc.gif"), create_original=False)
+    return converter.video_info['total_frames'], "frames", seconds, {'engine': ctx['gif_engine']}
+
+def stage_audio_chunks(ctx):
+    import audio_to_text
+    audio = ensure_input(INPUTS_DIR / "sine_noise.wav", make_audio)
+    start = time.perf_counter()
+    chunks = speech_seconds = 0
+    for _, samples in audio_to_text.vad_chunks(audio_to_text.stream_audio_chunks(str(audio))):
+        chunks += 1
+        speech_seconds += len(samples) / audio_to_text.SAMPLE_RATE
+    seconds = time.perf_counter() - start
+    # Throughput in audio seconds decoded and chunked per wall second (x realtime)
+    return AUDIO_SECONDS, "audio_s", seconds, {'chunks': chunks, 'speech_seconds': round(speech_seconds, 1)}
+
+def stage_cc_extract(ctx):
+    from cc_extractor import CCExtractor
+    video = ensure_input(INPUTS_DIR / "testsrc.mp4", make_video)
+    extractor = CCExtractor()
+    if not extractor.ffmpeg_path:
+        raise StageSkipped("ffmpeg not found")
+    files, seconds = timed(extractor.extract_all_subtitles, video, ctx['work_dir'] / "captions")
+    return len(files), "tracks", seconds
+
+def stage_cc_single_pass(ctx):
+    from cc_extractor import CCExtractor
+    video = ensure_input(INPUTS_DIR / "testsrc.mp4", make_video)
+    extractor = CCExtractor()
+    if not extractor.ffmpeg_path:
+        raise StageSkipped("ffmpeg not found")
+    (files, audio), seconds = timed(extractor.extract_all, video, ctx['work_dir'] / "captions_single")
+    return len(files), "tracks", seconds, {'audio': audio is not None}
+
+def stage_unity(ctx):
+    from unity_image_extractor import UnityImageExtractor
+    bundle_dir = INPUTS_DIR / "unity"
+    if not bundle_dir.exists():
+        make_unity_bundles(bundle_dir, ctx['unity_sample'])
+    # force: the extraction manifest would otherwise make every repeat after the first a no-op
+    extractor = UnityImageExtractor(str(ctx['work_dir'] / "unity"), force=True)
+    _, seconds = timed(extractor.extract_from_directory, str(bundle_dir))
+    images = extractor.stats['images_extracted']
+    return extractor.stats['files_processed'], "bundles", seconds, {
+        'images': images, 'images_per_sec': round(images / seconds, 2) if seconds > 0 else 0.0}
+
+# ---------------------------------------------------------------------------
+# Runner, results and baseline comparison
+# ---------------------------------------------------------------------------
+
+def run_stage(name, ctx, repeat, verbose):
+    """Run one stage `repeat` times and keep the median time"""
+    stage = globals()[f"stage_{name}"]
+    timings = []
+    try:
+        for _ in range(repeat):
+            with contextlib.ExitStack() as stack:
+                if not verbose:
+                    stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+                outcome = stage(ctx)
+            timings.append(outcome[2])
+    except StageSkipped as e:
+        return {'status': 'skipped', 'reason': str(e)}
+    except ImportError as e:
+        return {'status': 'skipped', 'reason': f"missing dependency: {e}"}
+    except Exception as e:
+        return {'status': 'error', 'reason': f"{type(e).__name__}: {e}"}
+
+    items, unit = outcome[0], outcome[1]
+    seconds = statistics.median(timings)
+    result = {'status': 'ok', 'items': items, 'unit': unit, 'seconds': round(seconds, 4),
+              'per_sec': round(items / seconds, 3) if seconds > 0 else 0.0, 'runs': len(timings)}
+    if len(outcome) > 3:
+        result.update(outcome[3])
+    return result
+
+def run_benchmarks(stages, repeat=1, verbose=False, gpu=False, gif_engine="ffmpeg", unity_sample=None):
+    INPUTS_DIR.mkdir(exist_ok=True)
+    work_dir = BENCH_DIR / "work"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir()
+    ctx = {'work_dir': work_dir, 'gpu': gpu, 'gif_engine': gif_engine, 'unity_sample': unity_sample}
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                    'processor': platform.processor(), 'cpu_count': os.cpu_count()},
+        'stages': {},
+    }
+    try:
+        for name in stages:
+            print(f"⏳ {name}...", end="", flush=True)
+            result = run_stage(name, ctx, repeat, verbose)
+            results['stages'][name] = result
+            if result['status'] == 'ok':
+                print(f"\r✅ {name}: {result['items']} {result['unit']} in {result['seconds']:.3f}s "
+                      f"({result['per_sec']:.2f} {result['unit']}/sec)")
+            else:
+                icon = "⚠️ " if result['status'] == 'skipped' else "❌"
+                print(f"\r{icon} {name}: {result['status']} - {result['reason']}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def save_results(results, path=None):
+    if path is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    path = Path(path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+def compare_results(current, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """Print throughput change per stage; return the names of stages that regressed"""
+    print(f"\n📊 Compared with baseline from {baseline.get('created', '?')}:")
+    print(f"   {'Stage':<16}{'Baseline':>14}{'Current':>14}{'Change':>10}")
+    regressed = []
+    for name, result in current['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if result.get('status') != 'ok' or not base or base.get('status') != 'ok' or not base.get('per_sec'):
+            print(f"   {name:<16}{'-':>14}{'-':>14}{'n/a':>10}")
+            continue
+        change = (result['per_sec'] - base['per_sec']) / base['per_sec']
+        flag = ""
+        if change < -threshold:
+            flag = "  ❌ regression"
+            regressed.append(name)
+        elif change > threshold:
+            flag = "  ✅ faster"
+        unit = result['unit']
+        print(f"   {name:<16}{base['per_sec']:>10.2f}/s{result['per_sec']:>10.2f}/s{change * 100:>+9.1f}%{flag}  ({unit})")
+    if regressed:
+        print(f"\n❌ {len(regressed)} stage(s) slower than baseline by more than {threshold * 100:.0f}%: {', '.join(regressed)}")
+    else:
+        print(f"\n✅ No stage slower than baseline by more than {threshold * 100:.0f}%")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the helper tools on synthetic inputs",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  py benchmark.py                          run every stage, save results/bench_<time>.json
+  py benchmark.py --save-baseline          run and store the result as baseline.json
+  py benchmark.py --compare                run and compare throughput with baseline.json
+  py benchmark.py --stages gif,cc_extract --repeat 3
+"""
+    )
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma separated stages (default: all): {', '.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage, the median time is kept")
+    parser.add_argument("--output", help="Result JSON path (default: results/bench_<time>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store the results as baseline.json")
+    parser.add_argument("--compare", nargs="?", const=str(BASELINE_PATH), metavar="BASELINE",
+                        help="Compare with a baseline JSON (default: baseline.json)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Throughput drop counted as a regression (default: 0.10 = 10%%)")
+    parser.add_argument("--gpu", action="store_true", help="Run the upscale loop on Real-ESRGAN instead of CPU lanes")
+    parser.add_argument("--gif-engine", choices=["ffmpeg", "moviepy"], default="ffmpeg", help="GIF engine to time")
+    parser.add_argument("--unity-sample", help="Real .unity3d bundle to build the Unity inputs from")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild the synthetic inputs")
+    parser.add_argument("--verbose", action="store_true", help="Show the tools' own output")
+    args = parser.parse_args()
+
+    stages = [name.strip() for name in args.stages.split(",") if name.strip()]
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        print(f"❌ Unknown stage(s): {', '.join(unknown)}")
+        sys.exit(1)
+    if args.regenerate:
+        shutil.rmtree(INPUTS_DIR, ignore_errors=True)
+
+    results = run_benchmarks(stages, max(1, args.repeat), args.verbose, args.gpu, args.gif_engine, args.unity_sample)
+    path = save_results(results, args.output)
+    print(f"\n💾 Results: {path}")
+    if args.save_baseline:
+        save_results(results, BASELINE_PATH)
+        print(f"💾 Baseline: {BASELINE_PATH}")
+
+    if args.compare:
+        try:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read baseline {args.compare}: {e}")
+            sys.exit(1)
+        if compare_results(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
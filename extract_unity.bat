@@ -11,10 +11,17 @@ echo Options:
 echo   -o, --output DIR     Output directory (default: Unity_Image_Extractor\extracted_images)
 echo   -r, --recursive      Search subdirectories recursively
 echo   --no-recursive       Don't search subdirectories
+echo   -j, --workers N      Extract with N worker processes
+echo   --force              Re-extract bundles that did not change since the last run
+echo   --format FMT         Output format: png, webp (lossless) or raw (default: png)
+echo   --png-level N        PNG compress level 0-9, 1 is fastest to save (default: 6)
+echo   --dedup MODE         Identical images: hardlink, index or off (default: hardlink)
 echo.
 echo Examples:
 echo   extract_unity.bat "C:\Game\Assets\ui.unity3d"
 echo   extract_unity.bat "C:\Game\Assets" -r -o "C:\Extracted"
+echo   extract_unity.bat "C:\Game\Assets" -r -j 8
+echo   extract_unity.bat "C:\Game\Assets" -r --png-level 1
 echo.
 
 echo Output will be saved to: Unity_Image_Extractor\extracted_images\
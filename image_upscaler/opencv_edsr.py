@@ -1,10 +1,173 @@
 import cv2
 import argparse
 import os
+import glob
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from upscale_cache import UpscaleCache, file_digest
+
+# Tiled engine: input pixels per tile side and pixels shared with neighbouring tiles.
+# Images with a side above TILE_AUTO_THRESHOLD are tiled unless --tile 0 is given.
+DEFAULT_TILE = 512
+DEFAULT_OVERLAP = 32
+TILE_AUTO_THRESHOLD = 2048
+DEFAULT_TILE_WORKERS = min(4, os.cpu_count() or 1)
+
+# Batch mode: images upscaled at once, and decoded images waiting ahead of inference
+DEFAULT_BATCH_WORKERS = min(2, os.cpu_count() or 1)
+BATCH_IO_THREADS = 2
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
+
+# One EDSR network per worker thread and scale (DnnSuperResImpl is not thread-safe),
+# kept for the life of the thread so readModel runs once, not once per image
+_thread_models = threading.local()
+
+def edsr_model_path(scale):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, "models", f"EDSR_x{scale}.pb")
+
+def get_thread_edsr(model_path, scale):
+    """EDSR model owned by the calling thread, created on first use"""
+    models = getattr(_thread_models, 'models', None)
+    if models is None:
+        models = _thread_models.models = {}
+    key = (model_path, scale)
+    if key not in models:
+        sr = cv2.dnn_superres.DnnSuperResImpl_create()
+        sr.readModel(model_path)
+        sr.setModel("edsr", scale)
+        models[key] = sr
+    return models[key]
+
+def _tile_starts(length, tile, overlap):
+    """Tile origins along one axis; the last tile is shifted back to end at the border"""
+    if length <= tile:
+        return [0]
+    step = tile - overlap
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+def _blend_ramp(length, ramp, fade_in, fade_out):
+    """1D weights: linear ramps over `ramp` pixels at edges shared with a neighbour"""
+    weights = np.ones(length, dtype=np.float32)
+    ramp = min(ramp, length // 2)
+    if ramp > 0:
+        rising = (np.arange(ramp, dtype=np.float32) + 0.5) / ramp
+        if fade_in:
+            weights[:ramp] = rising
+        if fade_out:
+            weights[-ramp:] = rising[::-1]
+    return weights
+
+def _blend_rows(out, row_totals, top, row_weights, left, block):
+    """
+    Write a horizontally blended block into out. Rows an earlier band already wrote
+    are merged as a running weighted mean, using the row weight each band gave them.
+    """
+    rows, cols, channels = block.shape
+    shared = int(np.count_nonzero(row_totals[top:top + rows]))  # earlier bands cover a prefix
+    if shared:
+        old_weight = row_totals[top:top + shared, None, None]
+        new_weight = row_weights[:shared, None, None]
+        old = out[top:top + shared, left:left + cols].reshape(shared, cols, channels).astype(np.float32)
+        block[:shared] = (old * old_weight + block[:shared] * new_weight) / (old_weight + new_weight)
+    target = out[top:top + rows, left:left + cols]
+    target[...] = np.clip(block + 0.5, 0, 255).astype(out.dtype).reshape(target.shape)
+
+def upscale_tiled(image, scale, upscale_tile, tile=DEFAULT_TILE, overlap=DEFAULT_OVERLAP,
+                  workers=DEFAULT_TILE_WORKERS, out=None, verbose=True):
+    """
+    Upscale an image tile by tile with upscale_tile(tile_image) -> tile_image * scale.
+
+    Tiles of one row (band) run in a thread pool (OpenCV releases the GIL) and are
+    blended with linear ramps across the overlap, so seams disappear. The ramps are
+    separable: within a band only the tile being added and the overlap it shares with
+    the previous tile are held in float, and finished column spans are merged straight
+    into `out` - a preallocated array or np.memmap - with per-row weights. Peak memory
+    follows tile size, not image size.
+    """
+    height, width = image.shape[:2]
+    channels = image.shape[2] if image.ndim == 3 else 1
+    overlap = max(0, min(overlap, tile // 2))
+    if out is None:
+        out = np.empty((height * scale, width * scale) + image.shape[2:], dtype=image.dtype)
+
+    ys = _tile_starts(height, tile, overlap)
+    xs = _tile_starts(width, tile, overlap)
+    ramp = overlap * scale
+    total_tiles = len(ys) * len(xs)
+    if verbose:
+        print(f"     Tiling: {len(xs)}x{len(ys)} tiles of {tile}px, {overlap}px overlap, {workers} workers")
+
+    row_totals = np.zeros(height * scale, dtype=np.float32)  # blend weight already merged into each output row
+    done_tiles = 0
+    # One worker runs the tiles on the calling thread, so they reuse that thread's EDSR network
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    run_tiles = pool.map if pool else map
+    try:
+        for band, y0 in enumerate(ys):
+            y1 = min(y0 + tile, height)
+            band_top, band_rows = y0 * scale, (y1 - y0) * scale
+            row_weights = _blend_ramp(band_rows, ramp, band > 0, band < len(ys) - 1)
+            crops = [image[y0:y1, x0:min(x0 + tile, width)] for x0 in xs]
+
+            pending = None  # (first column, acc, weight) of columns later tiles still overlap
+            for col, (x0, upscaled) in enumerate(zip(xs, run_tiles(upscale_tile, crops))):
+                upscaled = upscaled.reshape(upscaled.shape[0], upscaled.shape[1], channels).astype(np.float32)
+                left, cols = x0 * scale, upscaled.shape[1]
+                acc = np.zeros((band_rows, cols, channels), dtype=np.float32)
+                weight = np.zeros(cols, dtype=np.float32)
+                if pending is not None:
+                    # Columns left of this tile are final; the rest carries over into it
+                    pending_left, pending_acc, pending_weight = pending
+                    final_cols = left - pending_left
+                    _blend_rows(out, row_totals, band_top, row_weights, pending_left,
+                                pending_acc[:, :final_cols] / pending_weight[None, :final_cols, None])
+                    carried = pending_acc.shape[1] - final_cols
+                    acc[:, :carried] = pending_acc[:, final_cols:]
+                    weight[:carried] = pending_weight[final_cols:]
+                col_weights = _blend_ramp(cols, ramp, col > 0, col < len(xs) - 1)
+                acc += upscaled * col_weights[None, :, None]
+                weight += col_weights
+                pending = (left, acc, weight)
+                done_tiles += 1
+            pending_left, pending_acc, pending_weight = pending
+            _blend_rows(out, row_totals, band_top, row_weights, pending_left,
+                        pending_acc / pending_weight[None, :, None])
+            row_totals[band_top:band_top + band_rows] += row_weights
+            if verbose:
+                print(f"\r     Tiles: {done_tiles}/{total_tiles}", end="", flush=True)
+    finally:
+        if pool:
+            pool.shutdown()
+    if verbose:
+        print()
+    return out
+
+def cache_key(cache, digest, method, scale, tile, overlap, output_path):
+    # The output format is part of the result, so it is part of the key
+    params = {'overlap': overlap if tile != 0 else None, 'format': os.path.splitext(output_path)[1].lower()}
+    return cache.key(digest, method, scale, tile, params)
+
+def enhance_image_ai(image_path, scale, output_path, tile=None, overlap=DEFAULT_OVERLAP,
+                     workers=DEFAULT_TILE_WORKERS, use_memmap=False, cache=None):
+    """
+    Enhance image using AI EDSR model if available, else classical method.
+    tile=None tiles large images automatically, 0 disables tiling.
+    With an UpscaleCache, a previous result for the same image and settings is reused.
+    """
+    model_path = edsr_model_path(scale)
+    if cache is not None:
+        digest = file_digest(image_path)
+        method = "edsr" if os.path.exists(model_path) else "classical"
+        if cache.fetch(cache_key(cache, digest, method, scale, tile, overlap, output_path), output_path):
+            print(f"✅ Reused cached result: {output_path}")
+            return
 
-def enhance_image_ai(image_path, scale, output_path):
-    """Enhance image using AI EDSR model if available, else classical method."""
     # Read image
     print("[1/5] Loading image...")
     image = cv2.imread(image_path)
@@ -12,45 +175,79 @@ def enhance_image_ai(image_path, scale, output_path):
         raise ValueError(f"Could not read image: {image_path}")
     print(f"     Image loaded: {image.shape[0]}x{image.shape[1]}")
 
-    # Get script directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(script_dir, "models", f"EDSR_x{scale}.pb")
+    requested_tile = tile
+    height, width = image.shape[:2]
+    if tile is None:
+        tile = DEFAULT_TILE if max(height, width) > TILE_AUTO_THRESHOLD else 0
+
+    out = None
+    memmap_path = output_path + ".upscale.npy"
+    if tile and use_memmap:
+        # Output lives on disk while it is assembled; only the current band stays in RAM
+        out = np.lib.format.open_memmap(memmap_path, mode="w+", dtype=image.dtype,
+                                        shape=(height * scale, width * scale) + image.shape[2:])
+
+    def classical_tile(crop):
+        return enhance_image_classical(crop, scale, verbose=False)
+
+    def run_classical():
+        if not tile:
+            return enhance_image_classical(image, scale)
+        print(f"[2/4] Upscaling {scale}x with Lanczos + CLAHE + sharpening, tile by tile...")
+        return upscale_tiled(image, scale, classical_tile, tile, overlap, workers, out)
 
     # Try AI method first
-    if os.path.exists(model_path):
-        try:
-            print(f"[2/5] Loading EDSR model: {model_path}")
-            # Create super resolution object
-            sr = cv2.dnn_superres.DnnSuperResImpl_create()
-            print("[3/5] Reading model weights...")
-            sr.readModel(model_path)
-            sr.setModel("edsr", scale)
-            print(f"[4/5] Upscaling image {scale}x (this may take 15-30 seconds)...")
-            # Upscale
-            upscaled = sr.upsample(image)
-            print(f"     Upscaling complete! New size: {upscaled.shape[0]}x{upscaled.shape[1]}")
-        except Exception as e:
-            print(f"Failed to run EDSR model: {e}")
-            upscaled = enhance_image_classical(image, scale)
-    else:
-        print(f"EDSR model not found: {model_path}")
-        upscaled = enhance_image_classical(image, scale)
+    upscaled = None
+    method = "classical"
+    try:
+        if os.path.exists(model_path):
+            try:
+                print(f"[2/5] Loading EDSR model: {model_path}")
+                print("[3/5] Reading model weights...")
+                sr = get_thread_edsr(model_path, scale)
+                if tile:
+                    print(f"[4/5] Upscaling image {scale}x in tiles...")
+                    upscaled = upscale_tiled(image, scale,
+                                             lambda crop: get_thread_edsr(model_path, scale).upsample(crop),
+                                             tile, overlap, workers, out)
+                else:
+                    print(f"[4/5] Upscaling image {scale}x (this may take 15-30 seconds)...")
+                    # Upscale
+                    upscaled = sr.upsample(image)
+                method = "edsr"
+                print(f"     Upscaling complete! New size: {upscaled.shape[0]}x{upscaled.shape[1]}")
+            except Exception as e:
+                print(f"Failed to run EDSR model: {e}")
+                upscaled = run_classical()
+        else:
+            print(f"EDSR model not found: {model_path}")
+            upscaled = run_classical()
 
-    # Save result
-    print("[5/5] Saving result...")
-    cv2.imwrite(output_path, upscaled)
-    print(f"✅ Saved enhanced image to: {output_path}")
+        # Save result
+        print("[5/5] Saving result...")
+        cv2.imwrite(output_path, upscaled)
+        print(f"✅ Saved enhanced image to: {output_path}")
+        if cache is not None:
+            cache.store(cache_key(cache, digest, method, scale, requested_tile, overlap, output_path), output_path)
+    finally:
+        if out is not None:
+            # Drop every reference to the mapping so Windows lets us delete the file
+            out = upscaled = None
+            if os.path.exists(memmap_path):
+                os.remove(memmap_path)
 
-def enhance_image_classical(image, scale):
+def enhance_image_classical(image, scale, verbose=True):
     """Classical image enhancement using CLAHE + good upsampling + unsharp mask."""
     # Resize using Lanczos
-    print("[2/4] Resizing image with Lanczos interpolation...")
+    if verbose:
+        print("[2/4] Resizing image with Lanczos interpolation...")
     height, width = image.shape[:2]
     new_height, new_width = height * scale, width * scale
     resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
 
     # Convert to LAB color space
-    print("[3/4] Applying adaptive contrast enhancement...")
+    if verbose:
+        print("[3/4] Applying adaptive contrast enhancement...")
     lab = cv2.cvtColor(resized, cv2.COLOR_BGR2LAB)
 
     # Apply CLAHE to L channel
@@ -62,23 +259,165 @@ def enhance_image_classical(image, scale):
     enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
 
     # Sharpen using unsharp mask
-    print("[4/4] Applying sharpening filter...")
+    if verbose:
+        print("[4/4] Applying sharpening filter...")
     blurred = cv2.GaussianBlur(enhanced, (5, 5), 1.0)
     sharpened = cv2.addWeighted(enhanced, 1.5, blurred, -0.5, 0)
 
     return sharpened
 
+def upscale_image(image, scale, tile=None, overlap=DEFAULT_OVERLAP):
+    """Quiet single-image upscale for batch mode: (image, "edsr" or "classical")"""
+    model_path = edsr_model_path(scale)
+    if tile is None:
+        tile = DEFAULT_TILE if max(image.shape[:2]) > TILE_AUTO_THRESHOLD else 0
+    if os.path.exists(model_path):
+        try:
+            if tile:
+                return upscale_tiled(image, scale, lambda crop: get_thread_edsr(model_path, scale).upsample(crop),
+                                     tile, overlap, workers=1, verbose=False), "edsr"
+            return get_thread_edsr(model_path, scale).upsample(image), "edsr"
+        except cv2.error as e:
+            print(f"⚠️ EDSR failed ({e}), using classical upscaling")
+    if tile:
+        return upscale_tiled(image, scale, lambda crop: enhance_image_classical(crop, scale, verbose=False),
+                             tile, overlap, workers=1, verbose=False), "classical"
+    return enhance_image_classical(image, scale, verbose=False), "classical"
+
+def collect_images(pattern):
+    """Image files in a directory or matching a glob pattern, sorted"""
+    if os.path.isdir(pattern):
+        candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        candidates = glob.glob(pattern)
+    return sorted(path for path in candidates
+                  if os.path.isfile(path) and os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS)
+
+def is_up_to_date(source, destination):
+    return os.path.exists(destination) and os.path.getmtime(destination) >= os.path.getmtime(source)
+
+def _write_image(path, image):
+    """Encode next to the destination, then rename, so a half-written file never looks finished"""
+    root, ext = os.path.splitext(path)
+    temp_path = f"{root}.part{ext}"
+    if not cv2.imwrite(temp_path, image):
+        raise ValueError(f"Could not write image: {path}")
+    os.replace(temp_path, path)
+
+def enhance_batch(inputs, scale, output_dir, tile=None, overlap=DEFAULT_OVERLAP,
+                  workers=DEFAULT_BATCH_WORKERS, force=False, cache=None):
+    """
+    Upscale many images as a pipeline: decode runs ahead on I/O threads, inference
+    runs on `workers` threads (each with its own EDSR network) and encoding happens
+    in the background. Outputs newer than their source are skipped, and with an
+    UpscaleCache, images upscaled before with the same settings are not redone.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    method = "edsr" if os.path.exists(edsr_model_path(scale)) else "classical"
+    jobs, skipped, cached = [], 0, 0
+    for source in inputs:
+        stem, ext = os.path.splitext(os.path.basename(source))
+        destination = os.path.join(output_dir, f"{stem}_edsr_x{scale}{ext}")
+        if not force and is_up_to_date(source, destination):
+            skipped += 1
+            continue
+        digest = file_digest(source) if cache is not None else None
+        if digest and cache.fetch(cache_key(cache, digest, method, scale, tile, overlap, destination), destination):
+            cached += 1
+        else:
+            jobs.append((source, destination, digest))
+
+    print(f"📁 {len(inputs)} images: {len(jobs)} to upscale, {skipped} up to date, {cached} from cache "
+          f"({method} {scale}x, {workers} workers)")
+    if not jobs:
+        return {'done': 0, 'skipped': skipped, 'cached': cached, 'failed': 0}
+
+    def save(destination, result, digest):
+        image, used_method = result
+        _write_image(destination, image)
+        if digest:
+            cache.store(cache_key(cache, digest, used_method, scale, tile, overlap, destination), destination)
+
+    done = failed = 0
+    start = time.perf_counter()
+    depth = workers * 2  # decoded images allowed to wait for a worker
+    with ThreadPoolExecutor(max_workers=BATCH_IO_THREADS) as io_pool, \
+         ThreadPoolExecutor(max_workers=workers) as infer_pool:
+        decodes = deque(io_pool.submit(cv2.imread, source) for source, _, _ in jobs[:depth])
+        upscales, writes = deque(), []
+
+        def finish_oldest():
+            nonlocal failed
+            source, destination, digest, future = upscales.popleft()
+            try:
+                writes.append((source, io_pool.submit(save, destination, future.result(), digest)))
+            except Exception as e:
+                print(f"❌ {os.path.basename(source)}: {e}")
+                failed += 1
+
+        for index, (source, destination, digest) in enumerate(jobs):
+            image = decodes.popleft().result()
+            if index + depth < len(jobs):
+                decodes.append(io_pool.submit(cv2.imread, jobs[index + depth][0]))
+            if image is None:
+                print(f"❌ Could not read image: {source}")
+                failed += 1
+                continue
+            upscales.append((source, destination, digest,
+                             infer_pool.submit(upscale_image, image, scale, tile, overlap)))
+            if len(upscales) >= depth:
+                finish_oldest()
+        while upscales:
+            finish_oldest()
+
+        for source, future in writes:
+            try:
+                future.result()
+                done += 1
+                print(f"\r⏳ Upscaled {done}/{len(jobs)}", end="", flush=True)
+            except Exception as e:
+                print(f"\n❌ {os.path.basename(source)}: {e}")
+                failed += 1
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"\n✅ {done} upscaled, {skipped} skipped, {cached} from cache, {failed} failed "
+          f"in {elapsed:.1f}s ({rate:.2f} images/sec)")
+    print(f"   Output: {output_dir}")
+    return {'done': done, 'skipped': skipped, 'cached': cached, 'failed': failed,
+            'seconds': elapsed, 'images_per_sec': rate}
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Enhance image using EDSR or classical method")
-    parser.add_argument("input", help="Input image path")
+    parser.add_argument("input", help="Input image path, or a directory / glob pattern for batch mode")
     parser.add_argument("--scale", type=int, default=4, choices=[2,3,4], help="Upscale factor")
-    parser.add_argument("--output", required=True, help="Output image path")
+    parser.add_argument("--output", required=True, help="Output image path (output folder in batch mode)")
+    parser.add_argument("--tile", type=int, default=None,
+                        help=f"Tile size in input pixels (default: {DEFAULT_TILE} for images over {TILE_AUTO_THRESHOLD}px, 0 = off)")
+    parser.add_argument("--overlap", type=int, default=DEFAULT_OVERLAP, help="Pixels shared between neighbouring tiles")
+    parser.add_argument("--workers", type=int, default=DEFAULT_TILE_WORKERS, help="Tiles upscaled in parallel")
+    parser.add_argument("--memmap", action="store_true", help="Assemble the output in a temporary file instead of RAM")
+    parser.add_argument("--batch-workers", type=int, default=DEFAULT_BATCH_WORKERS,
+                        help="Images upscaled at once in batch mode")
+    parser.add_argument("--force", action="store_true", help="Batch mode: redo images whose output is up to date")
+    parser.add_argument("--no-cache", action="store_true", help="Do not reuse or store results in the upscale cache")
 
     args = parser.parse_args()
 
+    cache = None if args.no_cache else UpscaleCache()
     try:
-        enhance_image_ai(args.input, args.scale, args.output)
-        print("\n✅ Enhancement completed successfully")
+        if os.path.isdir(args.input) or glob.has_magic(args.input):
+            images = collect_images(args.input)
+            if not images:
+                raise ValueError(f"No images found in: {args.input}")
+            stats = enhance_batch(images, args.scale, args.output, args.tile, args.overlap,
+                                  args.batch_workers, args.force, cache)
+            if stats['failed']:
+                exit(1)
+        else:
+            enhance_image_ai(args.input, args.scale, args.output, args.tile, args.overlap,
+                             args.workers, args.memmap, cache)
+            print("\n✅ Enhancement completed successfully")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         exit(1)
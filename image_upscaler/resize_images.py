@@ -1,7 +1,14 @@
 import cv2
+import argparse
 import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+IMAGE_SUFFIXES = {'.png', '.jpg', '.jpeg'}
+SQUARE_SIZE = 256
+DEFAULT_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+
 def get_image_dimensions(image_path):
     """Get image dimensions."""
     img = cv2.imread(str(image_path))
@@ -31,52 +38,12 @@ def resize_image_to_match(input_path, reference_path, output_path):
     cv2.imwrite(str(output_path), resized)
     print(f"Resized {input_path.name} to match {reference_path.name}: {ref_width}x{ref_height}")
 
-def main():
-    base_dir = Path(__file__).parent
-
-    # Resize samples to match their upscaled versions
-    samples_dir = base_dir / "samples"
-    output_dir = base_dir / "output"
-    resized_samples_dir = base_dir / "resized_samples"
-    resized_samples_dir.mkdir(exist_ok=True)
-
-    # Process each original sample - resize to 256x256 squares
-    for sample_file in samples_dir.glob("*"):
-        if sample_file.is_file() and sample_file.suffix.lower() in ['.png', '.jpg', '.jpeg']:
-            output_path = resized_samples_dir / sample_file.name
-            resize_image_to_square(sample_file, output_path)
-
-    # Resize outputs to squares (from resized_output directory)
-    resized_output_dir = base_dir / "resized_output"
-    resized_output_dir.mkdir(exist_ok=True)
-
-    # Clear existing resized_output and copy from output, then resize
-    for item in resized_output_dir.glob("*"):
-        item.unlink()
-
-    # Copy all output files to resized_output first
-    for img_file in output_dir.glob("*"):
-        if img_file.is_file():
-            import shutil
-            shutil.copy2(img_file, resized_output_dir / img_file.name)
-
-    # Now resize all files in resized_output to squares
-    for img_file in resized_output_dir.glob("*.png"):
-        temp_path = resized_output_dir / f"temp_{img_file.name}"
-        resize_image_to_square(img_file, temp_path)
-        temp_path.replace(img_file)  # Replace original with resized
-
-    for img_file in resized_output_dir.glob("*.jpg"):
-        temp_path = resized_output_dir / f"temp_{img_file.name}"
-        resize_image_to_square(img_file, temp_path)
-        temp_path.replace(img_file)  # Replace original with resized
-
 def resize_image_to_square(input_path, output_path, size=256):
     """Resize image to exact square dimensions with white padding."""
     img = cv2.imread(str(input_path))
     if img is None:
         print(f"Failed to load {input_path}")
-        return
+        return False
 
     height, width = img.shape[:2]
 
@@ -108,11 +75,73 @@ def resize_image_to_square(input_path, output_path, size=256):
         value=[255, 255, 255]  # White padding
     )
 
-    # Ensure exact dimensions
-    square_img = cv2.resize(square_img, (size, size), interpolation=cv2.INTER_LANCZOS4)
-
+    # The padding already makes the canvas exactly size x size - no second resize needed
     cv2.imwrite(str(output_path), square_img)
     print(f"Resized {input_path.name} to exact {size}x{size} square")
+    return True
+
+def is_up_to_date(source, destination):
+    return destination.exists() and destination.stat().st_mtime >= source.stat().st_mtime
+
+def _run_job(job):
+    """Worker entry point: one source read, one destination written"""
+    source, destination, size = job
+    if source.suffix.lower() in IMAGE_SUFFIXES:
+        return resize_image_to_square(source, destination, size)
+    shutil.copy2(source, destination)  # non-image outputs are mirrored unchanged
+    return True
+
+def plan_jobs(base_dir, size=SQUARE_SIZE, force=False):
+    """
+    (source, destination, size) jobs for samples/ -> resized_samples/ and
+    output/ -> resized_output/, leaving out destinations newer than their source.
+    """
+    jobs, skipped = [], 0
+    pairs = [("samples", "resized_samples", True), ("output", "resized_output", False)]
+    for source_name, dest_name, images_only in pairs:
+        source_dir, dest_dir = base_dir / source_name, base_dir / dest_name
+        dest_dir.mkdir(exist_ok=True)
+        sources = [f for f in source_dir.glob("*")
+                   if f.is_file() and (not images_only or f.suffix.lower() in IMAGE_SUFFIXES)]
+        if not images_only:
+            # resized_output mirrors output: drop results whose source is gone
+            names = {f.name for f in sources}
+            for item in dest_dir.glob("*"):
+                if item.is_file() and item.name not in names:
+                    item.unlink()
+        for source in sources:
+            destination = dest_dir / source.name
+            if not force and is_up_to_date(source, destination):
+                skipped += 1
+            else:
+                jobs.append((source, destination, size))
+    return jobs, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description="Resize samples and outputs to padded squares for comparisons")
+    parser.add_argument("--size", type=int, default=SQUARE_SIZE, help="Square side in pixels")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel resize processes")
+    parser.add_argument("--force", action="store_true", help="Redo files whose result is already up to date")
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).parent
+    jobs, skipped = plan_jobs(base_dir, args.size, args.force)
+    print(f"{len(jobs)} files to resize, {skipped} up to date")
+    if not jobs:
+        return
+
+    failed = 0
+    # Each file is independent, so spread them over processes (decode/encode hold the GIL only partly)
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs)))) as pool:
+        futures = {pool.submit(_run_job, job): job[0] for job in jobs}
+        for future in as_completed(futures):
+            try:
+                if not future.result():
+                    failed += 1
+            except Exception as e:
+                print(f"Failed to resize {futures[future].name}: {e}")
+                failed += 1
+    print(f"Done: {len(jobs) - failed} resized, {skipped} skipped, {failed} failed")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
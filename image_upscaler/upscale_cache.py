@@ -0,0 +1,130 @@
+"""
+Content-addressed cache of upscaled images, shared by opencv_edsr.py and video_upscaler.py
+
+Entries are keyed by (source content hash, model, scale, tile, params), so a result
+is reused no matter where the source lives or what it is called, and it survives
+output folders being cleaned. Least recently used entries are evicted once the cache
+grows past its size budget.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+# Cache location and size budget, overridable with UPSCALE_CACHE_DIR / UPSCALE_CACHE_MB
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / "cache"
+DEFAULT_BUDGET_MB = 4096
+# Eviction trims down to this share of the budget so it does not run on every store
+EVICT_TARGET = 0.9
+HASH_BLOCK_SIZE = 1 << 20
+
+def file_digest(path):
+    """BLAKE2b of a file's bytes, read in blocks"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class UpscaleCache:
+    def __init__(self, cache_dir=None, budget_mb=None):
+        self.cache_dir = Path(cache_dir or os.environ.get('UPSCALE_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        self.budget_bytes = int(float(budget_mb or os.environ.get('UPSCALE_CACHE_MB') or DEFAULT_BUDGET_MB) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None  # bytes on disk, counted on first store
+
+    def key(self, source_digest, model, scale, tile=None, params=None):
+        """Cache key for one source (file_digest) upscaled with the given settings"""
+        settings = {'model': model, 'scale': scale, 'tile': tile, 'params': params or {}}
+        payload = source_digest + json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=20).hexdigest()
+
+    def _entry(self, key, extension):
+        return self.cache_dir / key[:2] / f"{key}{extension}"
+
+    def fetch(self, key, destination):
+        """
+        Place a cached result at destination; False on a miss.
+        Always a copy: callers write outputs in place (cv2.imwrite), and a hardlink
+        would let a later run with other settings overwrite the cache entry.
+        """
+        destination = Path(destination)
+        entry = self._entry(key, destination.suffix.lower())
+        try:
+            os.utime(entry)  # mark as recently used
+            if destination.exists():
+                destination.unlink()
+            shutil.copyfile(entry, destination)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key, result_path):
+        """Add a finished result file to the cache"""
+        result_path = Path(result_path)
+        entry = self._entry(key, result_path.suffix.lower())
+        if entry.exists():
+            return
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        temp_entry = entry.with_name(f"{entry.name}.{threading.get_ident()}.tmp")
+        try:
+            shutil.copyfile(result_path, temp_entry)
+            os.replace(temp_entry, entry)
+        except OSError as e:
+            print(f"⚠️ Could not cache {result_path.name}: {e}")
+            temp_entry.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += entry.stat().st_size
+            if self._size > self.budget_bytes:
+                self._evict()
+
+    def _scan(self):
+        if not self.cache_dir.exists():
+            return []
+        entries = []
+        for path in self.cache_dir.glob('*/*'):
+            if path.suffix == '.tmp':
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is back under budget"""
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        target = self.budget_bytes * EVICT_TARGET
+        removed = 0
+        for path, entry_size, _ in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= entry_size
+            removed += 1
+        self._size = size
+        if removed:
+            print(f"\n   Cache: evicted {removed} old entries ({size / 1024 / 1024:.0f} MB kept)")
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"{self.hits}/{total} cache hits ({rate:.1f}%)"
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Media Probe - shared video/audio metadata for the helper tools
+Runs ffprobe with JSON output and caches results on disk, keyed by
+(path, size, mtime), so unchanged files are never probed twice.
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import threading
+from fractions import Fraction
+from pathlib import Path
+
+CACHE_PATH = Path(__file__).parent / "probe_cache.json"
+
+# Try common FFprobe locations, same order the other tools use for FFmpeg
+COMMON_FFPROBE_PATHS = [
+    r"C:\ffmpeg\bin\ffprobe.exe",
+    r"C:\Program Files\FFmpeg\bin\ffprobe.exe",
+    r"C:\Program Files (x86)\FFmpeg\bin\ffprobe.exe",
+]
+
+# Cache kinds written by earlier versions and dropped on the next save
+# ('packets' held every packet timestamp of a video and bloated the file)
+STALE_KINDS = ('packets',)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def find_ffprobe(ffmpeg_path=None):
+    """Find the ffprobe executable, preferring the one next to a known ffmpeg."""
+    candidates = []
+    if ffmpeg_path:
+        ffmpeg_path = Path(ffmpeg_path)
+        candidates.append(str(ffmpeg_path.with_name(ffmpeg_path.name.replace('ffmpeg', 'ffprobe'))))
+    candidates += COMMON_FFPROBE_PATHS
+
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    return shutil.which('ffprobe')
+
+def _load_cache():
+    """Load the on-disk cache once per process."""
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+def _save_cache(key, entry):
+    """
+    Merge one entry into the on-disk cache and write it atomically, so tools
+    running at the same time neither read half a file nor drop each other's entries.
+    """
+    try:
+        with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+            on_disk = json.load(f)
+    except (OSError, ValueError):
+        on_disk = {}
+    on_disk = {k: v for k, v in on_disk.items() if k.rpartition('|')[2] not in STALE_KINDS}
+    on_disk[key] = entry
+
+    temp_path = CACHE_PATH.with_name(f"{CACHE_PATH.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(on_disk, f)
+        os.replace(temp_path, CACHE_PATH)
+    except OSError:
+        pass  # The cache is an optimization only
+
+def _cached_ffprobe(media_path, kind, ffprobe_args, parse, ffprobe_path=None, use_cache=True, timeout=60):
+    """
+    Run ffprobe with JSON output and cache parse(json) under (path, kind).
+    Cached results are reused while the file's size and mtime are unchanged.
+    """
+    media_path = Path(media_path).resolve()
+    stat = media_path.stat()
+    key = f"{media_path}|{kind}"
+
+    with _cache_lock:
+        entry = _load_cache().get(key) if use_cache else None
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return entry['result']
+
+    ffprobe_path = ffprobe_path or find_ffprobe()
+    if not ffprobe_path:
+        raise RuntimeError("FFprobe not found. Install FFmpeg (ffprobe ships with it) and add it to your PATH.")
+
+    cmd = [ffprobe_path, '-v', 'error', '-print_format', 'json'] + ffprobe_args + [str(media_path)]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"Timeout while probing {media_path.name}")
+    if result.returncode != 0:
+        raise RuntimeError(f"FFprobe failed on {media_path.name}: {result.stderr.strip()}")
+
+    data = parse(json.loads(result.stdout))
+
+    if use_cache:
+        with _cache_lock:
+            entry = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'result': data}
+            _load_cache()[key] = entry
+            _save_cache(key, entry)
+    return data
+
+def probe(media_path, ffprobe_path=None, use_cache=True):
+    """
+    Return ffprobe's JSON ('format' and 'streams') for a media file.
+
+    Results are cached in probe_cache.json keyed by the resolved path, and reused
+    while the file's size and mtime are unchanged.
+    """
+    return _cached_ffprobe(
+        media_path, 'info', ['-show_format', '-show_streams'],
+        lambda data: {'format': data.get('format', {}), 'streams': data.get('streams', [])},
+        ffprobe_path, use_cache
+    )
+
+def get_video_keyframes(media_path, ffprobe_path=None, use_cache=True):
+    """
+    Return the first video stream's keyframes as
+    {'frames': packet count, 'start': first pts in seconds,
+     'keyframes': [[index, seconds], ...]}, indexes counted in presentation order.
+
+    Reads packet headers only (no decoding), so it is cheap enough to plan
+    keyframe-aligned segments even for long videos. Only keyframes are kept, so
+    the cache entry stays small however many packets the video has.
+    """
+    def parse(data):
+        packets = sorted(
+            (float(p['pts_time']), 'K' in p.get('flags', ''))
+            for p in data.get('packets', []) if p.get('pts_time') not in (None, 'N/A')
+        )
+        return {
+            'frames': len(packets),
+            'start': packets[0][0] if packets else 0.0,
+            'keyframes': [[i, pts] for i, (pts, is_key) in enumerate(packets) if is_key],
+        }
+
+    return _cached_ffprobe(
+        media_path, 'keyframes',
+        ['-select_streams', 'v:0', '-show_entries', 'packet=pts_time,flags'],
+        parse, ffprobe_path, use_cache, timeout=600
+    )
+
+def _parse_rate(rate):
+    """Parse an ffprobe frame rate such as '30000/1001' into a float."""
+    try:
+        value = Fraction(rate)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return float(value) if value > 0 else None
+
+def get_video_info(media_path, ffprobe_path=None):
+    """
+    Return the main video stream's metadata:
+    duration (float seconds), fps, width, height, total_frames, size_bytes.
+    Keys are omitted when ffprobe does not report them.
+    """
+    data = probe(media_path, ffprobe_path)
+    info = {}
+
+    size = data['format'].get('size')
+    if size:
+        info['size_bytes'] = int(size)
+
+    video_streams = [s for s in data['streams'] if s.get('codec_type') == 'video'
+                     and not s.get('disposition', {}).get('attached_pic')]
+    stream = video_streams[0] if video_streams else {}
+
+    duration = data['format'].get('duration') or stream.get('duration')
+    if duration:
+        info['duration'] = float(duration)
+
+    fps = _parse_rate(stream.get('avg_frame_rate')) or _parse_rate(stream.get('r_frame_rate'))
+    if fps:
+        info['fps'] = fps
+
+    if stream.get('width') and stream.get('height'):
+        info['width'] = int(stream['width'])
+        info['height'] = int(stream['height'])
+        # Phone videos store portrait as landscape plus a rotation; report displayed size
+        rotation = stream.get('tags', {}).get('rotate')
+        for side_data in stream.get('side_data_list', []):
+            rotation = side_data.get('rotation', rotation)
+        if rotation is not None and abs(int(float(rotation))) % 180 == 90:
+            info['width'], info['height'] = info['height'], info['width']
+
+    if stream.get('nb_frames', '').isdigit():
+        info['total_frames'] = int(stream['nb_frames'])
+    elif 'duration' in info and 'fps' in info:
+        info['total_frames'] = int(info['duration'] * info['fps'])
+
+    return info
+
+def get_streams(media_path, codec_type, ffprobe_path=None):
+    """
+    Return streams of one type ('video', 'audio', 'subtitle') as dicts with
+    index (absolute stream index), type_index (index within its type), codec, language.
+    """
+    data = probe(media_path, ffprobe_path)
+    streams = []
+    for stream in data['streams']:
+        if stream.get('codec_type') != codec_type:
+            continue
+        tags = stream.get('tags', {})
+        streams.append({
+            'index': stream['index'],
+            'type_index': len(streams),
+            'codec': stream.get('codec_name', 'unknown'),
+            'language': tags.get('language', 'unknown'),
+            'title': tags.get('title', ''),
+        })
+    return streams
+
+def main():
+    parser = argparse.ArgumentParser(description="Print cached ffprobe metadata for media files")
+    parser.add_argument("files", nargs='+', help="Media files to probe")
+    parser.add_argument("--raw", action="store_true", help="Print the full ffprobe JSON")
+    args = parser.parse_args()
+
+    try:
+        for media_file in args.files:
+            result = probe(media_file) if args.raw else get_video_info(media_file)
+            print(f"{media_file}:")
+            print(json.dumps(result, indent=2))
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -84,7 +84,7 @@ if defined output_dir echo Output: %output_dir%
 echo.
 
 REM Build command
-set cmd=py "C:\Program Files (x86)\helper_tools\Audio_to_Text_Transcriber\audio_to_text.py" "!audio_file!" --model %model% --language %language%
+set cmd=py "C:\Program Files (x86)\helper_tools\Audio_to_Text_Transcriber\audio_to_text.py" "!audio_file!" --model %model% --language %language% --server
 if defined output_dir set cmd=%cmd% --output-dir "%output_dir%"
 
 REM Run the command
@@ -13,10 +13,43 @@ import tempfile
 import os
 import sys
 import time
+import json
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Shared ffprobe metadata cache lives in its own helper folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "media_probe"))
+import media_probe
+
+# Frames handed to one Real-ESRGAN process at a time. Each process loads the
+# model and creates the Vulkan context once, so larger chunks mean less startup
+# overhead; smaller chunks mean less rework when a run is interrupted.
+DEFAULT_CHUNK_SIZE = 500
+
+# Streaming mode: frames per upscaler call, and frames per encoded part. A part is
+# the unit of resume - the checkpoint only advances when a part is closed.
+STREAM_CHUNK_SIZE = 32
+STREAM_PART_FRAMES = 1000
+# Real-ESRGAN starts a process (model load + Vulkan init) per call, so its stream chunks
+# are as large as this much memory of decoded frames allows, up to DEFAULT_CHUNK_SIZE
+STREAM_BUFFER_MB = 2048
+
+# Upscale lanes: Real-ESRGAN processes on the GPU, classical OpenCV workers on the CPU
+DEFAULT_LANES = {'gpu_workers': 1, 'gpu_ids': [], 'cpu_workers': 0}
+
+# Duplicate frame elision: max per-pixel difference (0-255) still treated as the same frame
+DEDUP_TOLERANCE = 10
+
+# Segment mode: keyframe-aligned pieces encoded in parallel and joined without
+# re-encoding. Each finished segment is a checkpoint. Timeouts scale per segment.
+DEFAULT_SEGMENTS = {'seconds': 60, 'jobs': 2}
+SEGMENT_TIMEOUT_PER_SECOND = 30
 
 def check_ffmpeg():
-    """Check if FFmpeg is available."""
-    if not shutil.which('ffmpeg'):
+    """Check if FFmpeg and FFprobe are available."""
+    if not shutil.which('ffmpeg') or not media_probe.find_ffprobe():
         print("FFmpeg not found!")
         print("   Download from: https://www.gyan.dev/ffmpeg/builds/")
         print("   Extract and add to PATH, or place in script directory")
@@ -24,35 +57,18 @@ def check_ffmpeg():
     return True
 
 def get_video_info(video_path):
-    """Get video metadata."""
-    cmd = [
-        'ffmpeg', '-i', str(video_path),
-        '-hide_banner'
-    ]
-
+    """Get video metadata from the shared ffprobe cache (media_probe)."""
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        stderr = result.stderr
-
-        import re
-        duration_match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2})', stderr)
-        fps_match = re.search(r'(\d+(?:\.\d+)?) fps', stderr)
-        resolution_match = re.search(r'(\d{3,4})x(\d{3,4})', stderr)
-
-        info = {}
-        if duration_match:
-            h, m, s = map(int, duration_match.groups())
-            info['duration_sec'] = h * 3600 + m * 60 + s
-        if fps_match:
-            info['fps'] = float(fps_match.group(1))
-        if resolution_match:
-            info['width'] = int(resolution_match.group(1))
-            info['height'] = int(resolution_match.group(2))
-
-        return info
-    except:
+        probed = media_probe.get_video_info(video_path)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Could not read video info: {e}")
         return {}
 
+    info = {key: probed[key] for key in ('fps', 'width', 'height') if key in probed}
+    if 'duration' in probed:
+        info['duration_sec'] = probed['duration']
+    return info
+
 def upscale_video_ffmpeg(video_path, output_path, scale):
     """
     Fast upscaling using FFmpeg with AMD GPU encoder.
@@ -208,9 +224,9 @@ def extract_frames_only(video_path, output_dir):
         frame_count = len(list(frames_dir.glob('*.png')))
         print(f"   ✓ Extracted {frame_count} frames\n")
 
-        # Process frames one by one with progress display
+        # Process frames in batches with progress display
         print("Step 2: Upscaling frames with Real-ESRGAN...")
-        print("   Processing each frame individually for reliable progress tracking")
+        print("   Processing frames in batches per Real-ESRGAN process")
         print("   💾 Frames saved persistently - can resume if interrupted\n")
 
         frame_files = sorted(frames_dir.glob('*.png'))
@@ -218,45 +234,14 @@ def extract_frames_only(video_path, output_dir):
         print(f"   Found {total_frames} frames to process")
 
         start_time = time.time()
-        processed_count = 0
-
-        for i, frame_file in enumerate(frame_files, 1):
-            upscaled_file = persistent_frames_dir / frame_file.name
-
-            # Skip if already processed
-            if upscaled_file.exists():
-                processed_count += 1
-                continue
-
-            # Show progress
-            progress = f"Processing frame {i}/{total_frames} ({i/total_frames*100:.1f}%)"
-            print(f"\r{progress}", end="", flush=True)
-
-            # Process single frame with Real-ESRGAN
-            upscale_cmd = [
-                str(realesrgan_exe),
-                '-i', str(frame_file),
-                '-o', str(upscaled_file),
-                '-s', str(scale),
-                '-n', 'realesrgan-x4plus',  # Use regular model instead of anime
-                '-m', str(realesrgan_exe.parent / 'models'),
-                '-t', '512',  # Smaller tile that might fit in VRAM
-            ]
-
-            # Try running Real-ESRGAN
-            result = subprocess.run(upscale_cmd, capture_output=True, text=True)
-
-            if result.returncode != 0:
-                stderr = result.stderr or result.stdout or ''
-                print(f"\n   ✗ Failed to upscale {frame_file.name}: {stderr}")
-                return False
-            else:
-                processed_count += 1
 
-            # Verify the frame was actually created
-            if not upscaled_file.exists():
-                print(f"\n   ✗ Upscaled frame not found: {upscaled_file}")
-                return False
+        processed_count = upscale_frames_batch(
+            realesrgan_exe, frame_files, persistent_frames_dir, scale,
+            'realesrgan-x4plus',  # Use regular model instead of anime
+            extra_args=['-t', '512'],  # Smaller tile that might fit in VRAM
+        )
+        if processed_count != total_frames:
+            return False
 
         elapsed = time.time() - start_time
         print(f"\n   ✓ Successfully processed {processed_count}/{total_frames} frames\n")
@@ -364,11 +349,14 @@ def main():
         epilog="""
 Methods:
   ffmpeg     = Fast (Lanczos), uses AMD VCE, good quality, preserves audio
-  realesrgan = AI anime upscaling, processes each frame individually with progress tracking
+  realesrgan = AI anime upscaling, frames batched per Real-ESRGAN process with progress tracking
+  stream     = decode → upscale → encode over pipes, no frame folders, resumable per part
 
 Examples:
   py video_upscaler.py video.mp4 --method ffmpeg --scale 4
+  py video_upscaler.py video.mp4 --method ffmpeg --scale 2 --segments --segment-jobs 3
   py video_upscaler.py video.mp4 --method realesrgan --scale 4 --format gif
+  py video_upscaler.py video.mp4 --method stream --scale 2
   py video_upscaler.py video.mp4 --method extract
   py video_upscaler.py video.mp4 --method process_existing --format mp4
 """
@@ -378,16 +366,42 @@ Examples:
     parser.add_argument('--output', help='Output file path (optional, auto-generated if not specified)')
     parser.add_argument('--scale', type=int, default=4, choices=[2,3,4],
                        help='Upscale factor (default: 4)')
-    parser.add_argument('--method', choices=['ffmpeg', 'realesrgan', 'extract', 'process_existing'], default='realesrgan',
-                       help='Upscaling method, extract for frame extraction only, process_existing for upscaling already extracted frames')
+    parser.add_argument('--method', choices=['ffmpeg', 'realesrgan', 'stream', 'extract', 'process_existing'], default='realesrgan',
+                       help='Upscaling method, stream for the pipe pipeline without frame folders, extract for frame extraction only, process_existing for upscaling already extracted frames')
+    parser.add_argument('--gpu-workers', type=int, default=DEFAULT_LANES['gpu_workers'],
+                       help='Concurrent Real-ESRGAN processes (default: 1)')
+    parser.add_argument('--gpu-ids', default='',
+                       help='Comma separated Vulkan GPU ids assigned round-robin to GPU workers, e.g. 0,1')
+    parser.add_argument('--cpu-workers', type=int, default=DEFAULT_LANES['cpu_workers'],
+                       help='Classical OpenCV upscale workers running alongside the GPU (default: 0)')
+    parser.add_argument('--dedup', action='store_true',
+                       help='Upscale only unique frames and reuse results for duplicate frames')
+    parser.add_argument('--dedup-tolerance', type=int, default=DEDUP_TOLERANCE,
+                       help=f'Max per-pixel difference still counted as a duplicate, 0 = exact only (default: {DEDUP_TOLERANCE})')
+    parser.add_argument('--stream-upscaler', choices=['realesrgan', 'classical'], default='realesrgan',
+                       help='Upscaler used by --method stream (default: realesrgan)')
+    parser.add_argument('--segments', action='store_true',
+                       help='Encode MP4 output as parallel, resumable segments joined without re-encoding (ffmpeg and realesrgan methods)')
+    parser.add_argument('--segment-seconds', type=int, default=DEFAULT_SEGMENTS['seconds'],
+                       help=f"Target segment length in seconds, cut at keyframes (default: {DEFAULT_SEGMENTS['seconds']})")
+    parser.add_argument('--segment-jobs', type=int, default=DEFAULT_SEGMENTS['jobs'],
+                       help=f"Segments encoded at the same time (default: {DEFAULT_SEGMENTS['jobs']})")
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Do not reuse or store upscaled frames in the shared upscale cache (realesrgan and process_existing)')
     parser.add_argument('--format', choices=['mp4', 'gif'], default='mp4',
                        help='Output format (default: mp4)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f'Frames per Real-ESRGAN process (default: {DEFAULT_CHUNK_SIZE})')
 
     args = parser.parse_args()
 
     if not check_ffmpeg():
         sys.exit(1)
 
+    if args.method == 'stream' and args.format != 'mp4':
+        print("Streaming mode writes MP4 only, use --method realesrgan for GIF output")
+        sys.exit(1)
+
     video_path = Path(args.input)
     if not video_path.exists():
         print(f"Video not found: {video_path}")
@@ -397,10 +411,24 @@ Examples:
     output_dir = script_dir / "output"
     output_dir.mkdir(exist_ok=True)
 
+    lanes = {
+        'gpu_workers': max(0, args.gpu_workers),
+        'gpu_ids': [int(gpu_id) for gpu_id in args.gpu_ids.split(',') if gpu_id.strip()],
+        'cpu_workers': max(0, args.cpu_workers),
+    }
+    dedup_tolerance = args.dedup_tolerance if args.dedup else None
+    segments = None
+    if args.segments:
+        segments = {'seconds': max(1, args.segment_seconds), 'jobs': max(1, args.segment_jobs)}
+
+    cache = None
+    if not args.no_cache and args.method in ('realesrgan', 'process_existing'):
+        cache = load_upscale_cache(script_dir)
+
     if args.output:
         output_path = Path(args.output)
     else:
-        suffix = 'ai' if args.method == 'realesrgan' else 'fast'
+        suffix = 'ai' if args.method in ('realesrgan', 'stream') else 'fast'
         extension = args.format
         output_path = output_dir / f"{video_path.stem}_upscaled_x{args.scale}_{suffix}.{extension}"
 
@@ -416,9 +444,8 @@ Examples:
         if 'fps' in info:
             print(f"FPS: {info['fps']:.2f}")
         if 'duration_sec' in info:
-            mins = info['duration_sec'] // 60
-            secs = info['duration_sec'] % 60
-            print(f"Duration: {mins}m {secs}s")
+            mins, secs = divmod(info['duration_sec'], 60)
+            print(f"Duration: {int(mins)}m {secs:.2f}s")
 
     print(f"Scale: {args.scale}x")
     print(f"Output: {output_path.name}")
@@ -428,11 +455,15 @@ Examples:
         if args.method == 'extract':
             success = extract_frames_only(video_path, output_dir)
         elif args.method == 'process_existing':
-            success = process_existing_frames(script_dir, args.scale, video_path, output_path, args.format)
+            success = process_existing_frames(script_dir, args.scale, video_path, output_path, args.format, args.chunk_size, lanes, dedup_tolerance, segments, cache)
+        elif args.method == 'ffmpeg' and segments is not None:
+            success = upscale_video_ffmpeg_segments(video_path, output_path, args.scale, script_dir, segments)
         elif args.method == 'ffmpeg':
             success = upscale_video_ffmpeg(video_path, output_path, args.scale)
+        elif args.method == 'stream':
+            success = upscale_video_stream(video_path, output_path, args.scale, script_dir, args.stream_upscaler)
         else:
-            success = upscale_video_realesrgan(video_path, output_path, args.scale, script_dir, args.format)
+            success = upscale_video_realesrgan(video_path, output_path, args.scale, script_dir, args.format, args.chunk_size, lanes, dedup_tolerance, segments, cache)
 
         if args.method == 'extract':
             print(f"{'='*70}")
@@ -480,22 +511,398 @@ Examples:
         traceback.print_exc()
         sys.exit(1)
 
-def upscale_video_realesrgan(video_path, output_path, scale, script_dir, output_format='mp4'):
+def upscale_frames_batch(realesrgan_exe, frame_files, upscaled_dir, scale, model_name,
+                         extra_args=None, chunk_size=DEFAULT_CHUNK_SIZE, verbose=True, staging_dir=None):
+    """
+    Upscale frames with one long-lived Real-ESRGAN process per chunk.
+
+    Pending frames are hardlinked into a staging folder which is passed to
+    realesrgan-ncnn-vulkan as a directory, so the model and Vulkan context are
+    set up once per chunk instead of once per frame. Frames that already exist
+    in upscaled_dir are skipped, so interrupted runs resume where they stopped.
+
+    Returns the number of frames present in upscaled_dir afterwards.
+    """
+    total_frames = len(frame_files)
+    pending = [f for f in frame_files if not (upscaled_dir / f.name).exists()]
+    done_count = total_frames - len(pending)
+
+    if done_count and verbose:
+        print(f"   Skipping {done_count} already upscaled frames")
+    if not pending:
+        return done_count
+
+    if staging_dir is None:
+        staging_dir = upscaled_dir.parent / f"{upscaled_dir.name}_batch"
+
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+
+        # Fresh staging folder holding only this chunk's frames
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        chunk_dir = staging_dir / "input"
+        chunk_dir.mkdir(parents=True)
+        for frame_file in chunk:
+            try:
+                os.link(frame_file, chunk_dir / frame_file.name)
+            except OSError:
+                shutil.copy2(frame_file, chunk_dir / frame_file.name)
+
+        upscale_cmd = [
+            str(realesrgan_exe),
+            '-i', str(chunk_dir),
+            '-o', str(upscaled_dir),
+            '-n', model_name,
+            '-m', str(realesrgan_exe.parent / 'models'),
+            '-s', str(scale),
+            '-f', 'png'
+        ] + (extra_args or [])
+
+        # Real-ESRGAN prints per-tile percentages to stderr; keep them in a log
+        # instead of a pipe so a full pipe buffer can never stall the GPU
+        log_path = staging_dir / "realesrgan.log"
+        with open(log_path, 'w', encoding='utf-8', errors='replace') as log_file:
+            process = subprocess.Popen(upscale_cmd, stdout=subprocess.DEVNULL, stderr=log_file)
+
+            # Stream progress by watching output files appear
+            while True:
+                finished = process.poll() is not None
+                chunk_done = sum(1 for f in chunk if (upscaled_dir / f.name).exists())
+                current = done_count + chunk_done
+                if verbose:
+                    print(f"\rProcessed {current}/{total_frames} frames ({current/total_frames*100:.1f}%)", end="", flush=True)
+                if finished:
+                    break
+                time.sleep(0.5 if verbose else 0.05)
+
+        if verbose:
+            print()
+        done_count += chunk_done
+
+        if process.returncode != 0 or chunk_done != len(chunk):
+            log_tail = log_path.read_text(encoding='utf-8', errors='replace').strip().splitlines()[-5:]
+            print(f"   ✗ Real-ESRGAN batch failed (exit code {process.returncode}), "
+                  f"{len(chunk) - chunk_done} frames in this chunk not upscaled")
+            for line in log_tail:
+                print(f"     {line}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return done_count
+
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    return done_count
+
+def load_classical_enhancer(script_dir):
+    """Import enhance_image_classical from the sibling image_upscaler tool."""
+    image_upscaler_dir = str(script_dir.parent / "image_upscaler")
+    if image_upscaler_dir not in sys.path:
+        sys.path.insert(0, image_upscaler_dir)
+    from opencv_edsr import enhance_image_classical
+    return enhance_image_classical
+
+def load_upscale_cache(script_dir):
+    """Open the shared content-addressed upscale cache from the sibling image_upscaler tool."""
+    image_upscaler_dir = str(script_dir.parent / "image_upscaler")
+    if image_upscaler_dir not in sys.path:
+        sys.path.insert(0, image_upscaler_dir)
+    from upscale_cache import UpscaleCache
+    return UpscaleCache()
+
+def make_duplicate_detector(tolerance=DEDUP_TOLERANCE):
+    """
+    Return check(frame_file) -> earlier frame it duplicates, or None if it is unique.
+
+    Frames are decoded at half size. Exact repeats anywhere in the clip are found by
+    hashing the decoded pixels. Near-identical frames are found by comparing against
+    the previous unique frame only: a frame is a duplicate when no pixel differs by
+    more than tolerance levels, so compression noise is ignored but a scene cut or a
+    moving cursor always produces a new unique frame.
+    """
+    import cv2
+    import numpy as np
+
+    seen_hashes = {}
+    last_unique = {'pixels': None, 'frame': None}
+
+    def check(frame_file):
+        pixels = cv2.imread(str(frame_file), cv2.IMREAD_REDUCED_COLOR_2)
+        if pixels is None:
+            return None
+
+        key = hashlib.blake2b(pixels.tobytes(), digest_size=16).digest()
+        source = seen_hashes.get(key)
+        if source is None and tolerance > 0 and last_unique['pixels'] is not None \
+                and last_unique['pixels'].shape == pixels.shape:
+            if cv2.absdiff(pixels, last_unique['pixels']).max() <= tolerance:
+                source = last_unique['frame']
+        if source is not None:
+            return source
+
+        seen_hashes[key] = frame_file
+        last_unique['pixels'] = pixels
+        last_unique['frame'] = frame_file
+        return None
+
+    return check
+
+def upscale_frames_scheduled(realesrgan_exe, frames_dir, upscaled_dir, scale, model_name, script_dir,
+                             lanes=None, chunk_size=DEFAULT_CHUNK_SIZE, extract_process=None, frame_files=None,
+                             dedup_tolerance=None, cache=None):
+    """
+    Upscale frames with concurrent GPU and CPU lanes pulling from one shared queue.
+
+    lanes = {'gpu_workers': N, 'gpu_ids': [ids], 'cpu_workers': M}
+    - GPU lane workers run batched Real-ESRGAN (upscale_frames_batch), one process each,
+      pinned round-robin to gpu_ids with -g
+    - CPU lane workers run enhance_image_classical frame by frame (OpenCV releases the GIL)
+
+    If extract_process is given, frames are queued while FFmpeg is still extracting them,
+    so decode, upscale and PNG writes overlap. Otherwise frame_files (or every PNG in
+    frames_dir) is queued up front. Frames already in upscaled_dir are skipped.
+
+    With dedup_tolerance set, duplicate frames are never queued; once the lanes finish,
+    they are hardlinked to the upscaled copy of the frame they repeat.
+
+    With an UpscaleCache, frames upscaled by an earlier run (same content, model and
+    scale) are taken from the cache instead of being queued, and new results are added.
+
+    Returns the number of queued frames present in upscaled_dir afterwards.
+    """
+    lanes = {**DEFAULT_LANES, **(lanes or {})}
+    frame_queue = queue.Queue()
+    feeding_done = threading.Event()
+    lane_stats = {}
+    counts = {'seen': 0, 'skipped': 0, 'cached': 0}
+    duplicates = {}
+    digests = {}
+
+    # Cache keys per lane: Real-ESRGAN results and classical results are different images
+    gpu_key_args = (model_name, scale, None, {'engine': 'realesrgan-ncnn-vulkan'})
+    cpu_key_args = ('classical', scale, None, {})
+    lookup_keys = [key_args for key_args, workers in ((gpu_key_args, lanes['gpu_workers']),
+                                                       (cpu_key_args, lanes['cpu_workers'])) if workers]
+
+    if cache is not None:
+        from upscale_cache import file_digest  # on sys.path once load_upscale_cache ran
+
+    def fetch_cached(frame_file):
+        digests[frame_file] = file_digest(frame_file)
+        target = upscaled_dir / frame_file.name
+        return any(cache.fetch(cache.key(digests[frame_file], *key_args), target) for key_args in lookup_keys)
+
+    def store_cached(frame_file, key_args):
+        target = upscaled_dir / frame_file.name
+        if frame_file in digests and target.exists():
+            cache.store(cache.key(digests[frame_file], *key_args), target)
+
+    find_duplicate = None
+    if dedup_tolerance is not None:
+        try:
+            find_duplicate = make_duplicate_detector(dedup_tolerance)
+        except ImportError as e:
+            print(f"   ⚠ Duplicate frame elision disabled ({e}). Install with: pip install opencv-python numpy")
+
+    def queue_frame(frame_file):
+        counts['seen'] += 1
+        # Hash every frame, even already upscaled ones, so later duplicates can refer back to them
+        source = find_duplicate(frame_file) if find_duplicate else None
+        if source is not None:
+            duplicates[frame_file] = source
+        elif (upscaled_dir / frame_file.name).exists():
+            counts['skipped'] += 1
+        elif cache is not None and fetch_cached(frame_file):
+            counts['cached'] += 1
+        else:
+            frame_queue.put(frame_file)
+
+    def feed_frames():
+        if frame_files is not None:
+            for frame_file in frame_files:
+                queue_frame(frame_file)
+        else:
+            queued = set()
+            while True:
+                extracting = extract_process is not None and extract_process.poll() is None
+                available = sorted(frames_dir.glob('*.png'))
+                # While FFmpeg is still writing, the newest file may be incomplete
+                if extracting:
+                    available = available[:-1]
+                for frame_file in available:
+                    if frame_file.name not in queued:
+                        queued.add(frame_file.name)
+                        queue_frame(frame_file)
+                if not extracting:
+                    break
+                time.sleep(0.5)
+        feeding_done.set()
+
+    def next_frame():
+        while True:
+            try:
+                return frame_queue.get(timeout=0.5)
+            except queue.Empty:
+                if feeding_done.is_set():
+                    return None
+
+    def gpu_worker(lane, gpu_id):
+        stats = lane_stats[lane]
+        extra_args = ['-g', str(gpu_id)] if gpu_id is not None else []
+        staging_dir = upscaled_dir.parent / f"{upscaled_dir.name}_{lane}"
+        while True:
+            frame_file = next_frame()
+            if frame_file is None:
+                break
+            # Fill the batch before starting Real-ESRGAN, waiting for the extractor if
+            # needed - short batches would bring back the per-process startup cost
+            batch = [frame_file]
+            while len(batch) < chunk_size:
+                try:
+                    batch.append(frame_queue.get(timeout=0.5))
+                except queue.Empty:
+                    if feeding_done.is_set():
+                        break
+            start = time.time()
+            done = upscale_frames_batch(realesrgan_exe, batch, upscaled_dir, scale, model_name,
+                                        extra_args=extra_args, chunk_size=len(batch),
+                                        verbose=False, staging_dir=staging_dir)
+            stats['busy'] += time.time() - start
+            stats['frames'] += done
+            if cache is not None:
+                for batch_frame in batch:
+                    store_cached(batch_frame, gpu_key_args)
+            if done != len(batch):
+                stats['failed'] += len(batch) - done
+                print(f"\n   ✗ {lane} stopped after a failed batch")
+                break
+
+    def cpu_worker(lane, enhance):
+        import cv2
+        stats = lane_stats[lane]
+        while True:
+            frame_file = next_frame()
+            if frame_file is None:
+                break
+            start = time.time()
+            image = cv2.imread(str(frame_file))
+            if image is None:
+                stats['failed'] += 1
+                continue
+            ok, encoded = cv2.imencode('.png', enhance(image, scale, verbose=False))
+            if not ok:
+                stats['failed'] += 1
+                continue
+            # Write under a temp name so a half-written frame never counts as done
+            temp_file = upscaled_dir / f"{frame_file.stem}.tmp"
+            temp_file.write_bytes(encoded.tobytes())
+            os.replace(temp_file, upscaled_dir / frame_file.name)
+            if cache is not None:
+                store_cached(frame_file, cpu_key_args)
+            stats['busy'] += time.time() - start
+            stats['frames'] += 1
+
+    workers = []
+    gpu_ids = lanes['gpu_ids'] or [None]
+    for i in range(lanes['gpu_workers']):
+        lane = f"gpu{i}"
+        lane_stats[lane] = {'frames': 0, 'busy': 0.0, 'failed': 0}
+        workers.append(threading.Thread(target=gpu_worker, args=(lane, gpu_ids[i % len(gpu_ids)]), daemon=True))
+
+    if lanes['cpu_workers']:
+        try:
+            enhance = load_classical_enhancer(script_dir)
+        except ImportError as e:
+            print(f"   ⚠ CPU lane disabled ({e}). Install with: pip install opencv-python numpy")
+        else:
+            for i in range(lanes['cpu_workers']):
+                lane = f"cpu{i}"
+                lane_stats[lane] = {'frames': 0, 'busy': 0.0, 'failed': 0}
+                workers.append(threading.Thread(target=cpu_worker, args=(lane, enhance), daemon=True))
+
+    if not workers:
+        print("   ✗ No upscale workers configured")
+        return 0
+
+    print(f"   Lanes: {', '.join(lane_stats)}")
+
+    start_time = time.time()
+    feeder = threading.Thread(target=feed_frames, daemon=True)
+    feeder.start()
+    for worker in workers:
+        worker.start()
+
+    while any(worker.is_alive() for worker in workers):
+        done = counts['skipped'] + counts['cached'] + sum(s['frames'] for s in lane_stats.values())
+        rate = (done - counts['skipped'] - counts['cached']) / max(time.time() - start_time, 1e-6)
+        status = "extracting" if not feeding_done.is_set() else "queued"
+        print(f"\rUpscaled {done}/{counts['seen']} {status} frames - {rate:.2f} fps", end="", flush=True)
+        time.sleep(0.5)
+    feeder.join()
+    print()
+
+    # Frames left behind when every lane stopped early
+    leftover = frame_queue.qsize()
+    if leftover:
+        print(f"   ✗ {leftover} frames left unprocessed")
+
+    if counts['skipped']:
+        print(f"   Skipped {counts['skipped']} already upscaled frames")
+    if cache is not None:
+        print(f"   Cache: {cache.summary()}")
+    print("   Lane throughput:")
+    for lane, stats in lane_stats.items():
+        lane_fps = stats['frames'] / stats['busy'] if stats['busy'] else 0.0
+        failed = f", {stats['failed']} failed" if stats['failed'] else ""
+        print(f"     {lane}: {stats['frames']} frames, {lane_fps:.2f} frames/sec{failed}")
+
+    # Duplicates reuse the upscaled result of the frame they repeat
+    reused = 0
+    for frame_file, source in duplicates.items():
+        target = upscaled_dir / frame_file.name
+        source_upscaled = upscaled_dir / source.name
+        if not target.exists():
+            if not source_upscaled.exists():
+                continue
+            try:
+                os.link(source_upscaled, target)
+            except OSError:
+                shutil.copy2(source_upscaled, target)
+        reused += 1
+
+    if find_duplicate and counts['seen']:
+        ratio = len(duplicates) / counts['seen'] * 100
+        print(f"   Dedup: {len(duplicates)}/{counts['seen']} frames were duplicates ({ratio:.1f}%), "
+              f"upscaled {counts['seen'] - len(duplicates)} unique frames")
+
+    return counts['skipped'] + counts['cached'] + sum(s['frames'] for s in lane_stats.values()) + reused
+
+def upscale_video_realesrgan(video_path, output_path, scale, script_dir, output_format='mp4', chunk_size=DEFAULT_CHUNK_SIZE,
+                             lanes=None, dedup_tolerance=None, segments=None, cache=None):
     """
     Full Real-ESRGAN workflow: extract frames → upscale → reassemble
+    Upscaling starts while frames are still being extracted.
     """
     print("Method: Real-ESRGAN (AI Upscaling)")
-    print("   Extracting frames → AI upscaling each frame → Reassembling video")
+    print(f"   Extracting frames → AI upscaling in batches of {chunk_size} frames → Reassembling video")
     print()
 
     output_dir = script_dir / "output"
     output_dir.mkdir(exist_ok=True)
 
-    # Step 1: Extract frames
+    realesrgan_exe = script_dir / "realesrgan-windows" / "realesrgan-ncnn-vulkan.exe"
+    if not realesrgan_exe.exists():
+        print(f"Real-ESRGAN not found: {realesrgan_exe}")
+        print("   Download from: https://github.com/xinntao/Real-ESRGAN-ncnn-vulkan")
+        print("   Extract to: realesrgan-windows/")
+        return False
+
     frames_dir = output_dir / f"{video_path.stem}_frames"
     frames_dir.mkdir(parents=True, exist_ok=True)
+    upscaled_dir = output_dir / f"{frames_dir.name}_upscaled_x{scale}"
+    upscaled_dir.mkdir(parents=True, exist_ok=True)
 
+    # Step 1 + 2: Extract frames while the upscale lanes consume them
     print(f"Step 1: Extracting frames to {frames_dir}")
+    print(f"Step 2: Upscaling frames to {upscaled_dir}")
 
     extract_cmd = [
         'ffmpeg', '-i', str(video_path),
@@ -503,73 +910,43 @@ def upscale_video_realesrgan(video_path, output_path, scale, script_dir, output_
         str(frames_dir / 'frame_%06d.png'),
         '-hide_banner', '-loglevel', 'error'
     ]
+    extract_process = subprocess.Popen(extract_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
 
-    result = subprocess.run(extract_cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"Frame extraction failed: {result.stderr}")
+    # Use anime model for better quality
+    model_name = f'realesr-animevideov3-x{scale}'
+
+    try:
+        processed_count = upscale_frames_scheduled(realesrgan_exe, frames_dir, upscaled_dir, scale, model_name,
+                                                   script_dir, lanes=lanes, chunk_size=chunk_size,
+                                                   extract_process=extract_process, dedup_tolerance=dedup_tolerance,
+                                                   cache=cache)
+    finally:
+        if extract_process.poll() is None:
+            extract_process.kill()
+        extract_stderr = extract_process.communicate()[1]
+
+    if extract_process.returncode != 0:
+        print(f"Frame extraction failed: {extract_stderr}")
         return False
 
     frame_count = len(list(frames_dir.glob('*.png')))
     print(f"✓ Extracted {frame_count} frames")
-
-    # Step 2: Upscale frames
-    upscaled_dir = output_dir / f"{frames_dir.name}_upscaled_x{scale}"
-    upscaled_dir.mkdir(parents=True, exist_ok=True)
-
-    print(f"\nStep 2: Upscaling {frame_count} frames to {upscaled_dir}")
-
-    realesrgan_exe = script_dir / "realesrgan-windows" / "realesrgan-ncnn-vulkan.exe"
-    if not realesrgan_exe.exists():
-        print(f"Real-ESRGAN not found: {realesrgan_exe}")
-        print("   Download from: https://github.com/xinntao/Real-ESRGAN-ncnn-vulkan")
-        print("   Extract to: realesrgan-windows/")
-        return False
-
-    frame_files = sorted(frames_dir.glob('*.png'))
-    processed_count = 0
-
-    for i, frame_file in enumerate(frame_files, 1):
-        upscaled_file = upscaled_dir / frame_file.name
-
-        # Skip if already processed
-        if upscaled_file.exists():
-            processed_count += 1
-            continue
-
-        # Use anime model for better quality
-        model_name = f'realesr-animevideov3-x{scale}'
-
-        upscale_cmd = [
-            str(realesrgan_exe),
-            '-i', str(frame_file),
-            '-o', str(upscaled_file),
-            '-n', model_name,
-            '-m', str(realesrgan_exe.parent / 'models'),
-            '-s', str(scale),
-            '-f', 'png'
-        ]
-
-        result = subprocess.run(upscale_cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            processed_count += 1
-            progress = f"Processed {processed_count}/{frame_count} frames ({processed_count/frame_count*100:.1f}%)"
-            print(f"\r{progress}", end="", flush=True)
-        else:
-            print(f"\nFailed to upscale {frame_file.name}: {result.stderr}")
-
-    print(f"\n✓ Successfully processed {processed_count}/{frame_count} frames")
+    print(f"✓ Successfully processed {processed_count}/{frame_count} frames")
 
     # Step 3: Reassemble
     if processed_count == frame_count:
         print("\nStep 3: Reassembling video...")
-        return reassemble_video_from_frames(upscaled_dir, video_path, output_path, script_dir, output_format)
+        return reassemble_video_from_frames(upscaled_dir, video_path, output_path, script_dir, output_format, segments)
 
     return processed_count > 0
+
+def process_existing_frames(script_dir, scale, video_path, output_path, output_format='mp4', chunk_size=DEFAULT_CHUNK_SIZE,
+                            lanes=None, dedup_tolerance=None, segments=None, cache=None):
     """
-    Process already extracted frames in the output folder - simple Real-ESRGAN per frame
+    Process already extracted frames in the output folder - batched Real-ESRGAN runs
     """
     print("Method: Process Existing Frames")
-    print("   Running Real-ESRGAN on each PNG frame individually")
+    print(f"   Running Real-ESRGAN on PNG frames in batches of up to {chunk_size}")
     print()
 
     output_dir = script_dir / "output"
@@ -597,46 +974,581 @@ def upscale_video_realesrgan(video_path, output_path, scale, script_dir, output_
     total_frames = len(frame_files)
     print(f"Found {total_frames} frames to upscale")
 
-    processed_count = 0
+    processed_count = upscale_frames_scheduled(realesrgan_exe, frames_dir, upscaled_dir, scale,
+                                               'realesr-animevideov3-x2',  # Correct anime model for x2
+                                               script_dir, lanes=lanes, chunk_size=chunk_size,
+                                               frame_files=frame_files, dedup_tolerance=dedup_tolerance,
+                                               cache=cache)
 
-    for i, frame_file in enumerate(frame_files, 1):
-        upscaled_file = upscaled_dir / frame_file.name
+    print(f"✓ Successfully processed {processed_count}/{total_frames} frames")
 
-        # Skip if already processed
-        if upscaled_file.exists():
-            processed_count += 1
-            continue
+    # Now reassemble into video
+    if processed_count == total_frames:
+        print("\nReassembling video from upscaled frames...")
+        return reassemble_video_from_frames(upscaled_dir, video_path, output_path, script_dir, output_format, segments)
 
-        progress = f"Processing frame {i}/{total_frames} ({i/total_frames*100:.1f}%)"
-        print(f"\r{progress}", end="", flush=True)
+    return processed_count > 0
 
-        # Simple Real-ESRGAN command - exactly like single image upscaler
-        upscale_cmd = [
-            str(realesrgan_exe),
-            '-i', str(frame_file),
-            '-o', str(upscaled_file),
-            '-s', str(scale),
-            '-n', 'realesr-animevideov3-x2',  # Correct anime model for x2
-            '-m', str(realesrgan_exe.parent / 'models'),
-            '-f', 'png'
-        ]
+def stream_chunk_size(upscaler, frame_bytes):
+    """Frames per upscaler call in streaming mode"""
+    if upscaler != 'realesrgan':
+        return STREAM_CHUNK_SIZE
+    # Two chunks are in memory at once: one being collected, one being written out
+    fit = STREAM_BUFFER_MB * 1024 * 1024 // (2 * frame_bytes)
+    return max(STREAM_CHUNK_SIZE, min(DEFAULT_CHUNK_SIZE, fit))
+
+def make_frame_upscaler(upscaler, script_dir, scale, scratch_dir=None):
+    """
+    Build a callable that upscales a list of BGR frames (NumPy arrays) and returns
+    an iterable of upscaled frames in the same order.
+
+    realesrgan - frames pass through a scratch folder (under scratch_dir) per chunk; the
+                 input list is emptied once written, and results are read back one at a
+                 time as they are consumed, so a large chunk never sits in memory upscaled
+    classical  - Lanczos + CLAHE + unsharp mask from image_upscaler/opencv_edsr.py, no disk at all
+    """
+    import cv2
 
-        result = subprocess.run(upscale_cmd, capture_output=True, text=True)
+    if upscaler == 'classical':
+        enhance_image_classical = load_classical_enhancer(script_dir)
+        return lambda frames: [enhance_image_classical(frame, scale, verbose=False) for frame in frames]
 
-        if result.returncode == 0 and upscaled_file.exists():
-            processed_count += 1
+    realesrgan_exe = script_dir / "realesrgan-windows" / "realesrgan-ncnn-vulkan.exe"
+    if not realesrgan_exe.exists():
+        raise FileNotFoundError(f"Real-ESRGAN not found: {realesrgan_exe}")
+    model_name = f'realesr-animevideov3-x{scale}'
+
+    def upscale(frames):
+        temp_dir = Path(tempfile.mkdtemp(prefix="chunk_", dir=scratch_dir))
+        in_dir = temp_dir / "in"
+        out_dir = temp_dir / "out"
+        try:
+            in_dir.mkdir()
+            out_dir.mkdir()
+
+            # Uncompressed PNG - the scratch files live for one chunk only
+            frame_files = []
+            for i, frame in enumerate(frames):
+                frame_file = in_dir / f"frame_{i:06d}.png"
+                cv2.imwrite(str(frame_file), frame, [cv2.IMWRITE_PNG_COMPRESSION, 0])
+                frame_files.append(frame_file)
+            frames.clear()  # the scratch copies are all Real-ESRGAN needs
+
+            done = upscale_frames_batch(realesrgan_exe, frame_files, out_dir, scale, model_name,
+                                        chunk_size=len(frame_files), verbose=False)
+            if done != len(frame_files):
+                raise RuntimeError(f"Real-ESRGAN upscaled {done}/{len(frame_files)} frames of the chunk")
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        def read_back():
+            try:
+                for frame_file in frame_files:
+                    yield cv2.imread(str(out_dir / frame_file.name))
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return read_back()
+
+    return upscale
+
+def amf_encoder_available():
+    """Check once whether FFmpeg can actually open the AMD h264_amf encoder."""
+    cmd = [
+        'ffmpeg', '-f', 'lavfi', '-i', 'color=c=black:s=256x256',
+        '-frames:v', '1', '-c:v', 'h264_amf', '-f', 'null', '-',
+        '-hide_banner', '-loglevel', 'error'
+    ]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=30).returncode == 0
+    except (subprocess.TimeoutExpired, OSError):
+        return False
+
+def load_stream_checkpoint(checkpoint_path, upscaler, source):
+    """
+    Load the streaming checkpoint, starting fresh if it belongs to a different upscaler
+    or input - source is {'source', 'size', 'mtime'} of the video, so a different or
+    re-encoded file with the same name never resumes from another video's parts.
+    """
+    if checkpoint_path.exists():
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('upscaler') != upscaler:
+                print(f"   ⚠ Checkpoint was made with '{checkpoint.get('upscaler')}', starting over")
+            elif checkpoint.get('input') != source:
+                print("   ⚠ Checkpoint was made for a different or changed input, starting over")
+            else:
+                return checkpoint
+        except (OSError, ValueError):
+            print("   ⚠ Checkpoint unreadable, starting over")
+        for part in checkpoint_path.parent.glob("part_*.mp4"):
+            part.unlink()
+    return {'upscaler': upscaler, 'input': source, 'frames_done': 0, 'parts': [], 'encoder_args': None}
+
+def save_stream_checkpoint(checkpoint_path, checkpoint):
+    """Write the checkpoint atomically so a crash never leaves it half written."""
+    temp_path = checkpoint_path.with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(temp_path, checkpoint_path)
+
+def upscale_video_stream(video_path, output_path, scale, script_dir, upscaler='realesrgan',
+                         chunk_size=None, part_frames=STREAM_PART_FRAMES):
+    """
+    Streaming workflow: FFmpeg decode → upscaler → FFmpeg encode over raw frame pipes.
+
+    Decoded frames travel through bounded in-memory queues instead of PNG folders.
+    Chunks are upscaled on a worker thread while the next chunk is collected, so
+    decoding never waits for inference (chunk_size=None picks stream_chunk_size).
+    The encoder output is split into parts of part_frames frames; after each part is
+    closed the checkpoint records how many frames are done, so a rerun resumes from
+    the last finished part. Parts are joined with the concat demuxer at the end.
+    """
+    print("Method: Streaming pipeline (no frame folders)")
+    print(f"   FFmpeg decode → {upscaler} → FFmpeg encode over raw frame pipes")
+    print()
+
+    stream_dir = script_dir / "output" / f"{video_path.stem}_stream_x{scale}"
+    scratch_dir = stream_dir / "scratch"
+    try:
+        import numpy as np
+        upscale = make_frame_upscaler(upscaler, script_dir, scale, scratch_dir)
+    except ImportError:
+        print("NumPy and OpenCV are required for streaming. Install with: pip install numpy opencv-python")
+        return False
+    except FileNotFoundError as e:
+        print(e)
+        return False
+
+    info = get_video_info(video_path)
+    if 'width' not in info or 'height' not in info:
+        print("Could not read video resolution")
+        return False
+
+    width, height = info['width'], info['height']
+    fps = info.get('fps', 30)
+    out_width, out_height = width * scale, height * scale
+    frame_bytes = width * height * 3
+    total_frames = int(info.get('duration_sec', 0) * fps)
+    chunk_size = chunk_size or stream_chunk_size(upscaler, frame_bytes)
+
+    scratch_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = stream_dir / "checkpoint.json"
+    stat = video_path.stat()
+    source = {'source': str(video_path.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+    checkpoint = load_stream_checkpoint(checkpoint_path, upscaler, source)
+    start_frame = checkpoint['frames_done']
+
+    # Parts must share one encoder so they can be concatenated without re-encoding
+    if checkpoint['encoder_args'] is None:
+        if out_width > 4000 or out_height > 2000 or not amf_encoder_available():
+            checkpoint['encoder_args'] = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '18']
         else:
-            print(f"\nFailed to upscale {frame_file.name}: {result.stderr}")
-            continue
+            checkpoint['encoder_args'] = ['-c:v', 'h264_amf', '-quality', 'quality', '-rc', 'cqp', '-qp_i', '18', '-qp_p', '18']
+    encoder_args = checkpoint['encoder_args']
 
-    print(f"\n✓ Successfully processed {processed_count}/{total_frames} frames")
+    if start_frame:
+        print(f"   Resuming from frame {start_frame} ({len(checkpoint['parts'])} parts done)")
+    print(f"   Encoder: {encoder_args[1]} | Chunk: {chunk_size} frames | Checkpoint every {part_frames} frames\n")
 
-    # Now reassemble into video
-    if processed_count == total_frames:
-        print("\nReassembling video from upscaled frames...")
-        return reassemble_video_from_frames(upscaled_dir, video_path, output_path, script_dir, output_format)
+    decode_cmd = [
+        'ffmpeg', '-i', str(video_path),
+        '-map', '0:v:0',
+        '-vf', f'select=gte(n\\,{start_frame})',
+        '-vsync', '0',
+        '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-',
+        '-hide_banner', '-loglevel', 'error'
+    ]
+    decoder_log = open(stream_dir / "decoder.log", 'w', encoding='utf-8', errors='replace')
+    decoder = subprocess.Popen(decode_cmd, stdout=subprocess.PIPE, stderr=decoder_log)
+
+    # Bounded queues keep little more than the chunk being collected in memory; the
+    # write queue holds finished chunks (lazy readers for Real-ESRGAN)
+    frame_queue = queue.Queue(maxsize=STREAM_CHUNK_SIZE * 2)
+    write_queue = queue.Queue(maxsize=2)
+    writer_errors = []
+
+    def read_frames():
+        while True:
+            data = decoder.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            frame_queue.put(np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3))
+        frame_queue.put(None)
+
+    def start_part():
+        part_path = stream_dir / f"part_{len(checkpoint['parts']):04d}.mp4"
+        encode_cmd = [
+            'ffmpeg',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{out_width}x{out_height}', '-r', str(fps),
+            '-i', '-',
+        ] + encoder_args + [
+            '-pix_fmt', 'yuv420p',
+            '-y', str(part_path),
+            '-hide_banner', '-loglevel', 'error'
+        ]
+        encoder_log = open(stream_dir / "encoder.log", 'a', encoding='utf-8', errors='replace')
+        encoder = subprocess.Popen(encode_cmd, stdin=subprocess.PIPE, stderr=encoder_log)
+        return encoder, part_path, encoder_log
+
+    def write_frames():
+        encoder = None
+        written = 0
+        while True:
+            batch = write_queue.get()
+            if batch is None:
+                break
+            if writer_errors:
+                continue  # Keep draining so the upscaler never blocks
+            try:
+                for frame in batch:
+                    if encoder is None:
+                        encoder, part_path, encoder_log = start_part()
+                        written = 0
+                    encoder.stdin.write(memoryview(np.ascontiguousarray(frame)))
+                    written += 1
+                    if written == part_frames:
+                        finish_part(encoder, part_path, encoder_log, written)
+                        encoder = None
+            except (OSError, RuntimeError) as e:
+                writer_errors.append(e)
+        if encoder is not None and not writer_errors:
+            try:
+                finish_part(encoder, part_path, encoder_log, written)
+            except RuntimeError as e:
+                writer_errors.append(e)
+
+    def finish_part(encoder, part_path, encoder_log, written):
+        encoder.stdin.close()
+        encoder.wait()
+        encoder_log.close()
+        if encoder.returncode != 0:
+            raise RuntimeError(f"Encoder failed on {part_path.name}, see {stream_dir / 'encoder.log'}")
+        checkpoint['parts'].append(part_path.name)
+        checkpoint['frames_done'] += written
+        save_stream_checkpoint(checkpoint_path, checkpoint)
+
+    reader_thread = threading.Thread(target=read_frames, daemon=True)
+    writer_thread = threading.Thread(target=write_frames, daemon=True)
+    reader_thread.start()
+    writer_thread.start()
+
+    start_time = time.time()
+    processed = 0
+    reached_end = False
+
+    def hand_over(future, count):
+        """Queue a finished chunk for the encoder and report progress"""
+        nonlocal processed
+        write_queue.put(future.result())
+        processed += count
+        current = start_frame + processed
+        rate = processed / max(time.time() - start_time, 1e-6)
+        if total_frames:
+            print(f"\rProcessed {current}/{total_frames} frames ({current/total_frames*100:.1f}%) - {rate:.2f} fps", end="", flush=True)
+        else:
+            print(f"\rProcessed {current} frames - {rate:.2f} fps", end="", flush=True)
 
-    return processed_count > 0
+    # One chunk is upscaled on the worker thread while the next one is collected
+    upscale_pool = ThreadPoolExecutor(max_workers=1)
+    pending = None  # (future, frame count) of the chunk being upscaled
+    try:
+        while not reached_end and not writer_errors:
+            batch = []
+            while len(batch) < chunk_size:
+                frame = frame_queue.get()
+                if frame is None:
+                    reached_end = True
+                    break
+                batch.append(frame)
+
+            if pending:
+                hand_over(*pending)
+                pending = None
+            if batch:
+                pending = (upscale_pool.submit(upscale, batch), len(batch))
+        if pending and not writer_errors:
+            hand_over(*pending)
+    finally:
+        upscale_pool.shutdown()
+        # Close the current part so every finished frame lands in the checkpoint
+        write_queue.put(None)
+        writer_thread.join()
+        if not reached_end and decoder.poll() is None:
+            decoder.kill()
+        decoder.wait()
+        decoder_log.close()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        print()
+
+    if writer_errors:
+        print(f"   ✗ {writer_errors[0]}")
+        return False
+
+    if decoder.returncode != 0:
+        print(f"   ✗ Decoder failed, see {stream_dir / 'decoder.log'}")
+        return False
+
+    print(f"✓ Streamed {checkpoint['frames_done']} frames in {len(checkpoint['parts'])} parts")
+    if not checkpoint['parts']:
+        print("No frames were decoded")
+        return False
+
+    print("Joining parts and copying audio...")
+    parts_list = stream_dir / "parts.txt"
+    parts_list.write_text(''.join(f"file '{name}'\n" for name in checkpoint['parts']), encoding='utf-8')
+    mux_cmd = [
+        'ffmpeg',
+        '-f', 'concat', '-safe', '0', '-i', str(parts_list),
+        '-i', str(video_path),
+        '-map', '0:v',
+        '-map', '1:a?',
+        '-c', 'copy',
+        '-shortest',
+        '-y',
+        str(output_path),
+        '-hide_banner', '-loglevel', 'error'
+    ]
+    result = subprocess.run(mux_cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"   ✗ Joining parts failed: {result.stderr}")
+        return False
+
+    # Parts are only an intermediate copy of the output
+    shutil.rmtree(stream_dir, ignore_errors=True)
+    print("✓ Video assembled from streamed parts")
+    return True
+
+def pick_encoder_args(out_width, out_height):
+    """Encoder settings shared by every segment of one output (same rules as reassembly)."""
+    if out_width > 4000 or out_height > 2000:
+        return ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '28']
+    if amf_encoder_available():
+        return ['-c:v', 'h264_amf', '-quality', 'quality', '-rc', 'cqp', '-qp_i', '18', '-qp_p', '18']
+    return ['-c:v', 'libx264', '-preset', 'fast', '-crf', '18']
+
+def plan_keyframe_segments(video_path, segment_seconds):
+    """
+    Split the timeline at keyframes into segments of at least segment_seconds.
+    Returns [{'start': seconds from first frame, 'frames': frame count}, ...].
+    """
+    keyframes = media_probe.get_video_keyframes(video_path)
+    if not keyframes['frames']:
+        return []
+
+    firsts = [(0, keyframes['start'])]  # (frame index, pts) where each segment starts
+    for index, pts in keyframes['keyframes']:
+        if pts - firsts[-1][1] >= segment_seconds:
+            firsts.append((index, pts))
+
+    segments = []
+    for n, (first, pts) in enumerate(firsts):
+        end = firsts[n + 1][0] if n + 1 < len(firsts) else keyframes['frames']
+        segments.append({'start': pts - keyframes['start'], 'frames': end - first})
+    return segments
+
+def run_segment_jobs(segment_dir, jobs, max_workers):
+    """
+    Run FFmpeg segment encodes in parallel, skipping segments already on disk.
+
+    jobs = [(segment_name, cmd_without_output, timeout), ...]
+    Each segment is written under a temp name and renamed when FFmpeg succeeds, so a
+    file named seg_XXXX.mp4 is always complete - that is the resume checkpoint.
+    Returns the list of finished segment paths in order, or None if any failed.
+    """
+    pending = [job for job in jobs if not (segment_dir / job[0]).exists()]
+    done_before = len(jobs) - len(pending)
+    if done_before:
+        print(f"   Resuming: {done_before}/{len(jobs)} segments already encoded")
+
+    def encode(job):
+        name, cmd, timeout = job
+        temp_path = segment_dir / f"{Path(name).stem}.part.mp4"
+        try:
+            result = subprocess.run(cmd + ['-y', str(temp_path)], capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return name, f"timed out after {timeout}s"
+        if result.returncode != 0:
+            return name, result.stderr.strip().splitlines()[-1:] or ['unknown error']
+        os.replace(temp_path, segment_dir / name)
+        return name, None
+
+    failed = []
+    finished = done_before
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(encode, job) for job in pending]
+        for future in as_completed(futures):
+            name, error = future.result()
+            if error:
+                failed.append(name)
+                print(f"\n   ✗ {name} failed: {error}")
+            else:
+                finished += 1
+                print(f"\rEncoded {finished}/{len(jobs)} segments", end="", flush=True)
+    print()
+
+    if failed:
+        print(f"   ✗ {len(failed)} segments failed - rerun to retry only those")
+        return None
+    return [segment_dir / job[0] for job in jobs]
+
+def concat_segments(segment_files, audio_source, output_path, segment_dir):
+    """Join encoded segments with the concat demuxer (no re-encode) and copy the original audio."""
+    list_path = segment_dir / "segments.txt"
+    list_path.write_text(''.join(f"file '{f.name}'\n" for f in segment_files), encoding='utf-8')
+    cmd = [
+        'ffmpeg',
+        '-f', 'concat', '-safe', '0', '-i', str(list_path),
+        '-i', str(audio_source),
+        '-map', '0:v',
+        '-map', '1:a?',
+        '-c', 'copy',
+        '-shortest',
+        '-y',
+        str(output_path),
+        '-hide_banner', '-loglevel', 'error'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"   ✗ Joining segments failed: {result.stderr}")
+        return False
+    return True
+
+def prepare_segment_dir(segment_dir, plan):
+    """
+    Create the segment folder and record the plan; if an earlier run used a different
+    plan (other settings or a changed input), its segments are discarded.
+    """
+    manifest_path = segment_dir / "manifest.json"
+    if segment_dir.exists():
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                if json.load(f) != plan:
+                    print("   Segment settings changed, discarding old segments")
+                    shutil.rmtree(segment_dir)
+        except (OSError, ValueError):
+            shutil.rmtree(segment_dir)
+    segment_dir.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=2)
+
+def upscale_video_ffmpeg_segments(video_path, output_path, scale, script_dir, segments=None):
+    """
+    Lanczos upscaling split into keyframe-aligned segments encoded in parallel.
+    Finished segments survive a crash; a rerun only encodes the missing ones.
+    """
+    segments = {**DEFAULT_SEGMENTS, **(segments or {})}
+    print("Method: FFmpeg + segment-parallel encoding")
+    print(f"   ~{segments['seconds']}s keyframe-aligned segments, {segments['jobs']} parallel encodes")
+    print()
+
+    info = get_video_info(video_path)
+    if 'width' not in info or 'height' not in info:
+        print("Could not read video resolution")
+        return False
+
+    try:
+        plan = plan_keyframe_segments(video_path, segments['seconds'])
+    except (OSError, RuntimeError) as e:
+        print(f"Could not read keyframes: {e}")
+        return False
+    if not plan:
+        print("No video frames found")
+        return False
+
+    fps = info.get('fps', 30)
+    encoder_args = pick_encoder_args(info['width'] * scale, info['height'] * scale)
+    stat = video_path.stat()
+    segment_dir = script_dir / "output" / f"{video_path.stem}_segments_x{scale}"
+    prepare_segment_dir(segment_dir, {
+        'source': str(video_path.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+        'scale': scale, 'encoder_args': encoder_args, 'segments': plan
+    })
+    print(f"Encoder: {encoder_args[1]} | {len(plan)} segments")
+
+    jobs = []
+    for n, segment in enumerate(plan):
+        # Seek half a frame early so the keyframe itself is never dropped by accurate seeking
+        start = max(0.0, segment['start'] - 0.5 / fps)
+        cmd = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-ss', f"{start:.6f}", '-i', str(video_path),
+            '-map', '0:v:0',
+            '-frames:v', str(segment['frames']),
+            '-vf', f'scale=iw*{scale}:ih*{scale}:flags=lanczos',
+        ] + encoder_args + ['-an']
+        timeout = max(600, int(segment['frames'] / fps * SEGMENT_TIMEOUT_PER_SECOND))
+        jobs.append((f"seg_{n:04d}.mp4", cmd, timeout))
+
+    segment_files = run_segment_jobs(segment_dir, jobs, segments['jobs'])
+    if segment_files is None or not concat_segments(segment_files, video_path, output_path, segment_dir):
+        return False
+
+    shutil.rmtree(segment_dir, ignore_errors=True)
+    print("FFmpeg completed successfully!")
+    return True
+
+def reassemble_video_segments(frames_dir, original_video, output_path, script_dir, segments=None):
+    """
+    Reassemble upscaled frames as frame-range segments encoded in parallel, then join
+    them without re-encoding. Finished segments are kept, so reruns resume.
+    """
+    segments = {**DEFAULT_SEGMENTS, **(segments or {})}
+    info = get_video_info(original_video)
+    fps = info.get('fps', 30)
+
+    frame_files = sorted(frames_dir.glob('frame_*.png'))
+    if not frame_files:
+        print("No frame files found for reassembly")
+        return False
+
+    try:
+        import cv2
+        first_frame = cv2.imread(str(frame_files[0]))
+        height, width = first_frame.shape[:2]
+    except (ImportError, AttributeError):
+        # Fall back to the scale encoded in the folder name
+        import re
+        scale_match = re.search(r'_x(\d+)', frames_dir.name)
+        scale = int(scale_match.group(1)) if scale_match else 4
+        width, height = info.get('width', 1920) * scale, info.get('height', 1080) * scale
+
+    encoder_args = pick_encoder_args(width, height)
+    frames_per_segment = max(1, int(segments['seconds'] * fps))
+    total_frames = len(frame_files)
+    first_number = int(frame_files[0].stem.split('_')[-1])
+
+    segment_dir = frames_dir.parent / f"{frames_dir.name}_segments"
+    prepare_segment_dir(segment_dir, {
+        'frames': total_frames, 'fps': fps, 'frames_per_segment': frames_per_segment,
+        'encoder_args': encoder_args
+    })
+    print(f"Reassembling MP4 at {fps} FPS in {-(-total_frames // frames_per_segment)} segments "
+          f"({encoder_args[1]}, {segments['jobs']} parallel encodes)...")
+
+    jobs = []
+    for n, offset in enumerate(range(0, total_frames, frames_per_segment)):
+        count = min(frames_per_segment, total_frames - offset)
+        cmd = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-framerate', str(fps),
+            '-start_number', str(first_number + offset),
+            '-i', str(frames_dir / 'frame_%06d.png'),
+            '-frames:v', str(count),
+        ] + encoder_args + ['-pix_fmt', 'yuv420p']
+        timeout = max(600, int(count / fps * SEGMENT_TIMEOUT_PER_SECOND))
+        jobs.append((f"seg_{n:04d}.mp4", cmd, timeout))
+
+    segment_files = run_segment_jobs(segment_dir, jobs, segments['jobs'])
+    if segment_files is None or not concat_segments(segment_files, original_video, output_path, segment_dir):
+        return False
+
+    shutil.rmtree(segment_dir, ignore_errors=True)
+    print("✓ Video reassembled from segments!")
+    return True
 
 def cleanup_frames(script_dir):
     """
@@ -675,10 +1587,14 @@ def cleanup_frames(script_dir):
         else:
             print("Please enter 'y' for yes or 'n' for no.")
 
-def reassemble_video_from_frames(frames_dir, original_video, output_path, script_dir, output_format='mp4'):
+def reassemble_video_from_frames(frames_dir, original_video, output_path, script_dir, output_format='mp4', segments=None):
     """
     Reassemble upscaled frames back into video with original audio, or create GIF
+    With segments set, MP4 output is encoded as parallel, resumable segments.
     """
+    if segments is not None and output_format != 'gif':
+        return reassemble_video_segments(frames_dir, original_video, output_path, script_dir, segments)
+
     # Get video info
     info = get_video_info(original_video)
     fps = info.get('fps', 30)